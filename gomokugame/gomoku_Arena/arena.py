@@ -12,10 +12,13 @@ from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor, TimeoutError
 import signal
+import socket
 import sys
 import os
 import urllib3
 from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
 from urllib3.util.retry import Retry
 
 # 配置日志
@@ -34,6 +37,48 @@ def setup_logging(log_file: str = "logs/arena.log"):
 
 logger = setup_logging()
 
+class UnixSocketConnection(HTTPConnection):
+    """通过Unix域套接字发送HTTP请求的连接"""
+    
+    def __init__(self, socket_path: str, *args, **kwargs):
+        super().__init__("localhost", *args, **kwargs)
+        self.socket_path = socket_path
+    
+    def _new_conn(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+class UnixSocketConnectionPool(HTTPConnectionPool):
+    """Unix域套接字连接池"""
+    
+    def __init__(self, socket_path: str, **kwargs):
+        super().__init__("localhost", **kwargs)
+        self.socket_path = socket_path
+    
+    def _new_conn(self) -> UnixSocketConnection:
+        return UnixSocketConnection(self.socket_path, timeout=self.timeout.connect_timeout)
+
+class UnixSocketAdapter(HTTPAdapter):
+    """将本机AI的HTTP请求转发到Unix域套接字，省去TCP握手和协议栈开销"""
+    
+    def __init__(self, socket_path: str, **kwargs):
+        self.socket_path = socket_path
+        super().__init__(**kwargs)
+        self._pool = UnixSocketConnectionPool(socket_path, maxsize=self._pool_maxsize)
+    
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self._pool
+    
+    def get_connection(self, url, proxies=None):
+        return self._pool
+    
+    def close(self):
+        self._pool.close()
+        super().close()
+
 @dataclass
 class AIConfig:
     """AI配置信息"""
@@ -41,6 +86,7 @@ class AIConfig:
     ai_name: str
     port: int
     url: str
+    socket_path: Optional[str] = None  # 本机AI的Unix域套接字路径
 
 @dataclass
 class GameResult:
@@ -61,10 +107,14 @@ class GameResult:
 class GomokuArena:
     """五子棋AI对战平台"""
     
-    def __init__(self, game_server_url: str = "http://localhost:10000", timeout: int = 10, rounds_per_match: int = 2):
+    def __init__(self, game_server_url: str = "http://localhost:10000", timeout: int = 10, rounds_per_match: int = 2,
+                 parallel_games: int = 1):
         self.game_server_url = game_server_url
         self.timeout = timeout
         self.rounds_per_match = rounds_per_match
+        # 同时进行的对局数，>1 时各局的网络等待可以相互重叠
+        self.parallel_games = max(1, parallel_games)
+        self.pool_size = max(10, 2 * self.parallel_games)
         self.ais: List[AIConfig] = []
         self.results: List[GameResult] = []
         self.tournament_id = None
@@ -76,20 +126,35 @@ class GomokuArena:
             backoff_factor=0.1,
             status_forcelist=[429, 500, 502, 503, 504],
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=self.pool_size)
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
         
-    def add_ai(self, ai_id: str, ai_name: str, port: int):
-        """添加AI到对战平台"""
+    def add_ai(self, ai_id: str, ai_name: str, port: int, socket_path: Optional[str] = None):
+        """添加AI到对战平台，本机AI可指定Unix域套接字路径"""
         ai_config = AIConfig(
             ai_id=ai_id,
             ai_name=ai_name,
             port=port,
-            url=f"http://localhost:{port}"
+            url=f"http://localhost:{port}",
+            socket_path=socket_path
         )
         self.ais.append(ai_config)
-        logger.info(f"添加AI: {ai_name} (ID: {ai_id}, 端口: {port})")
+        
+        if socket_path:
+            # 该AI的所有请求都经由Unix域套接字发送
+            retry_strategy = Retry(
+                total=3,
+                backoff_factor=0.1,
+                status_forcelist=[429, 500, 502, 503, 504],
+            )
+            self.session.mount(
+                f"{ai_config.url}/",
+                UnixSocketAdapter(socket_path, max_retries=retry_strategy, pool_maxsize=self.pool_size)
+            )
+            logger.info(f"添加AI: {ai_name} (ID: {ai_id}, 套接字: {socket_path})")
+        else:
+            logger.info(f"添加AI: {ai_name} (ID: {ai_id}, 端口: {port})")
         
     def check_ai_health(self, ai_config: AIConfig) -> bool:
         """检查AI服务健康状态"""
@@ -461,11 +526,13 @@ class GomokuArena:
         # 循环赛：每个AI对战其他所有AI
         total_games = len(self.ais) * (len(self.ais) - 1) // 2
         current_game = 0
+        schedule = []
         
         for i in range(len(self.ais)):
             for j in range(i + 1, len(self.ais)):
                 current_game += 1
-                logger.info(f"进行第 {current_game}/{total_games} 局对战")
+                if self.parallel_games == 1:
+                    logger.info(f"进行第 {current_game}/{total_games} 局对战")
                 
                 # 每局对战指定轮数（交替交换黑白）
                 for round_num in range(self.rounds_per_match):
@@ -474,12 +541,29 @@ class GomokuArena:
                     else:
                         ai_black, ai_white = self.ais[j], self.ais[i]
                     
-                    result = self.play_game(ai_black, ai_white)
-                    self.results.append(result)
+                    if self.parallel_games == 1:
+                        result = self.play_game(ai_black, ai_white)
+                        self.results.append(result)
+                    else:
+                        schedule.append((current_game, round_num, ai_black, ai_white))
                     
                     # 短暂休息
                     # time.sleep(1)
         
+        if schedule:
+            # 并行进行对局，结果按赛程顺序记录
+            logger.info(f"并行进行 {len(schedule)} 局对战 (并发数: {self.parallel_games})")
+            
+            def play_scheduled(match):
+                game_num, round_num, ai_black, ai_white = match
+                # 在对局真正开始时输出进度，而不是在排入队列时
+                if round_num == 0:
+                    logger.info(f"进行第 {game_num}/{total_games} 局对战")
+                return self.play_game(ai_black, ai_white)
+            
+            with ThreadPoolExecutor(max_workers=self.parallel_games) as executor:
+                self.results.extend(executor.map(play_scheduled, schedule))
+        
         # 生成统计报告
         return self.generate_report()
     
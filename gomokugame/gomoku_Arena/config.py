@@ -27,6 +27,7 @@ LOGGING_CONFIG = {
 TOURNAMENT_CONFIG = {
     "rounds_per_match": 2,  # 每对AI对战轮数
     "delay_between_games": 1,  # 对局间隔（秒）
+    "parallel_games": 1,  # 同时进行的对局数
     "max_games_per_ai": 10  # 每个AI最大对局数
 }
 
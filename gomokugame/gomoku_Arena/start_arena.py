@@ -19,6 +19,8 @@ def main():
                        help='指定要参赛的AI ID列表 (默认: 使用配置文件中的所有AI)')
     parser.add_argument('--rounds-per-match', type=int, default=None,
                        help='每对AI对战轮数 (默认: 使用配置文件中的值)')
+    parser.add_argument('--parallel-games', type=int, default=None,
+                       help='同时进行的对局数 (默认: 使用配置文件中的值)')
     parser.add_argument('--create-config', action='store_true',
                        help='创建示例配置文件')
     parser.add_argument('--list-ais', action='store_true',
@@ -75,9 +77,11 @@ def main():
     timeout = args.timeout or config.get_timeout()
     tournament_config = config.get_tournament_config()
     rounds_per_match = args.rounds_per_match or tournament_config.get("rounds_per_match", 2)
+    parallel_games = args.parallel_games or tournament_config.get("parallel_games", 1)
     
     # 创建对战平台
-    arena = GomokuArena(game_server_url=game_server_url, timeout=timeout, rounds_per_match=rounds_per_match)
+    arena = GomokuArena(game_server_url=game_server_url, timeout=timeout, rounds_per_match=rounds_per_match,
+                        parallel_games=parallel_games)
     
     # 添加AI
     all_ais = config.get_ais()
@@ -101,11 +105,15 @@ def main():
     print(f"游戏服务器: {game_server_url}")
     print(f"超时时间: {timeout}秒")
     print(f"每对AI对战轮数: {rounds_per_match}")
+    print(f"并行对局数: {parallel_games}")
     print(f"参赛AI数量: {len(selected_ais)}")
     
     for ai in selected_ais:
-        arena.add_ai(ai['ai_id'], ai['ai_name'], ai['port'])
-        print(f"  - {ai['ai_name']} (端口: {ai['port']})")
+        arena.add_ai(ai['ai_id'], ai['ai_name'], ai['port'], ai.get('socket_path'))
+        if ai.get('socket_path'):
+            print(f"  - {ai['ai_name']} (套接字: {ai['socket_path']})")
+        else:
+            print(f"  - {ai['ai_name']} (端口: {ai['port']})")
     
     print("\n开始锦标赛...")
     
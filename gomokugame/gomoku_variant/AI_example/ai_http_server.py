@@ -7,81 +7,156 @@
 """
 
 import argparse
+import json
+import multiprocessing
 import requests
 import threading
 import time
-from datetime import datetime
+from array import array
 from flask import Flask, request, jsonify
 from typing import Dict, List, Tuple, Set, Optional
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 app = Flask(__name__)
 
+# 连珠检测的四个方向（横、竖、主对角线、副对角线）
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+# 周围8个相邻位置的偏移
+NEIGHBOR_OFFSETS = tuple((dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0))
+
+# 落子理由标志位，仅在最终选中的落子上才生成说明文字
+REASON_WIN = 1
+REASON_TRIPLET = 2
+REASON_BLOCK_WIN = 4
+REASON_BLOCK_TRIPLET = 8
+
+# 落子结果缓存的最大条目数（按棋盘内容、执子颜色和禁手点索引）
+MOVE_CACHE_SIZE = 2 ** 16
+
+# 内部棋盘表示：每行一个紧凑的 array('b')，仅在HTTP边界与列表互相转换
+Board = List[array]
+
+# 候选点少于该数量时多进程通信开销大于收益，直接在本进程评估
+PARALLEL_MIN_MOVES = 32
+
 class SmartGomokuAI:
     """智能五子棋AI - 基于三子连珠机制"""
     
-    def __init__(self, ai_id: str, ai_name: str):
+    def __init__(self, ai_id: str, ai_name: str, workers: int = 1):
         self.ai_id = ai_id
         self.ai_name = ai_name
         self.active_games = {}
-        self.lock = threading.Lock()
+        self.lock = threading.Lock()  # 仅保护 active_games 字典本身
         self.version = "1.0"
+        # workers > 1 时将候选点评估分片到进程池，绕开GIL利用多核
+        self.workers = workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        if workers > 1:
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        # 锦标赛中相同局面（尤其是开局）会反复出现，缓存其计算结果
+        self.move_cache: "OrderedDict[tuple, Tuple[Tuple[int, int], str]]" = OrderedDict()
+        self.cache_lock = threading.Lock()
+        # AI信息在进程内不变，预先序列化供 /info 直接返回
+        self.info_body = json.dumps(self.get_info(), ensure_ascii=False).encode("utf-8")
         
     def join_game(self, game_id: str, my_color: str, game_server_url: str) -> Dict:
         """加入游戏"""
         with self.lock:
             if game_id in self.active_games:
                 return {"status": "error", "message": "Already in this game"}
+        
+        # 获取游戏状态和禁手点（网络请求不占用全局锁）
+        try:
+            state_response = requests.get(f"{game_server_url}/games/{game_id}/state", timeout=3)
+            forbidden_response = requests.get(f"{game_server_url}/games/{game_id}/forbidden_points", timeout=3)
             
-            # 获取游戏状态和禁手点
-            try:
-                state_response = requests.get(f"{game_server_url}/games/{game_id}/state", timeout=3)
-                forbidden_response = requests.get(f"{game_server_url}/games/{game_id}/forbidden_points", timeout=3)
+            if state_response.status_code == 200 and forbidden_response.status_code == 200:
+                state = state_response.json()
+                forbidden_data = forbidden_response.json()
                 
-                if state_response.status_code == 200 and forbidden_response.status_code == 200:
-                    state = state_response.json()
-                    forbidden_data = forbidden_response.json()
-                    
-                    self.active_games[game_id] = {
-                        "my_color": my_color,
-                        "game_server_url": game_server_url,
-                        "board_size": len(state["board"]),
-                        "forbidden_points": set(tuple(p) for p in forbidden_data["forbidden_points"]),
-                        "joined_at": datetime.now()
-                    }
-                    
-                    return {
-                        "status": "joined",
-                        "ai_id": self.ai_id,
-                        "game_id": game_id,
-                        "my_color": my_color
-                    }
-                else:
-                    return {"status": "error", "message": "Failed to get game info"}
-            except Exception as e:
-                return {"status": "error", "message": f"Connection error: {str(e)}"}
+                board_size = len(state["board"])
+                forbidden_points = set(tuple(p) for p in forbidden_data["forbidden_points"])
+                
+                # 禁手点掩码，加入时计算一次，落子时按下标直接判断
+                forbidden_mask = [[False] * board_size for _ in range(board_size)]
+                for px, py in forbidden_points:
+                    forbidden_mask[px][py] = True
+                
+                game_info = {
+                    "my_color": my_color,
+                    "game_server_url": game_server_url,
+                    "board_size": board_size,
+                    "forbidden_points": forbidden_points,
+                    "forbidden_mask": forbidden_mask,
+                    "forbidden_key": frozenset(forbidden_points),
+                    "joined_at": time.time(),
+                    "lock": threading.Lock()  # 串行化同一局内的落子计算
+                }
+                
+                with self.lock:
+                    if game_id in self.active_games:
+                        return {"status": "error", "message": "Already in this game"}
+                    self.active_games[game_id] = game_info
+                
+                return {
+                    "status": "joined",
+                    "ai_id": self.ai_id,
+                    "game_id": game_id,
+                    "my_color": my_color
+                }
+            else:
+                return {"status": "error", "message": "Failed to get game info"}
+        except Exception as e:
+            return {"status": "error", "message": f"Connection error: {str(e)}"}
     
     def get_move(self, game_id: str, board: List[List[int]], current_player: str) -> Dict:
         """获取最佳落子位置"""
+        # 全局锁只保护 active_games 的读取，不同对局的计算可以并行
         with self.lock:
-            if game_id not in self.active_games:
-                return {"status": "error", "message": "Not in this game"}
-            
-            game_info = self.active_games[game_id]
-            
-            # 检查是否轮到我
-            if current_player != game_info["my_color"]:
-                return {"status": "error", "message": "Not my turn"}
-            
+            game_info = self.active_games.get(game_id)
+        
+        if game_info is None:
+            return {"status": "error", "message": "Not in this game"}
+        
+        # 检查是否轮到我
+        if current_player != game_info["my_color"]:
+            return {"status": "error", "message": "Not my turn"}
+        
+        with game_info["lock"]:
             try:
-                # 计算最佳落子
+                # 计算最佳落子，相同局面直接复用缓存结果
                 start_time = time.time()
-                best_move, reasoning = self.calculate_best_move(
-                    board, 
+                board = [array('b', row) for row in board]
+                cache_key = (
+                    b"".join(row.tobytes() for row in board),
                     current_player,
-                    game_info["forbidden_points"],
-                    game_info["board_size"]
+                    game_info["forbidden_key"]
                 )
+                with self.cache_lock:
+                    cached = self.move_cache.get(cache_key)
+                    if cached is not None:
+                        self.move_cache.move_to_end(cache_key)
+                
+                if cached is not None:
+                    best_move, reasoning = cached
+                else:
+                    best_move, reasoning = self.calculate_best_move(
+                        board, 
+                        current_player,
+                        game_info["forbidden_mask"],
+                        game_info["board_size"]
+                    )
+                    if best_move is not None:
+                        with self.cache_lock:
+                            self.move_cache[cache_key] = (best_move, reasoning)
+                            if len(self.move_cache) > MOVE_CACHE_SIZE:
+                                self.move_cache.popitem(last=False)
                 
                 elapsed = time.time() - start_time
                 
@@ -109,8 +184,8 @@ class SmartGomokuAI:
                 }
             return {"status": "error", "message": "Not in this game"}
     
-    def calculate_best_move(self, board: List[List[int]], my_color: str, 
-                           forbidden_points: Set[Tuple[int, int]], 
+    def calculate_best_move(self, board: Board, my_color: str, 
+                           forbidden_mask: List[List[bool]], 
                            board_size: int) -> Tuple[Optional[Tuple[int, int]], str]:
         """计算最佳落子位置 - 核心AI逻辑"""
         
@@ -121,12 +196,33 @@ class SmartGomokuAI:
         my_triplets = self.count_triplets(board, my_value, board_size)
         opponent_triplets = self.count_triplets(board, opponent_value, board_size)
         
-        # 获取所有有效位置
+        # 标记已有棋子周围两格内的区域，最佳落子几乎总在这个范围内
+        near_stone = [[False] * board_size for _ in range(board_size)]
+        for i in range(board_size):
+            row = board[i]
+            for j in range(board_size):
+                if row[j] != 0:
+                    for ni in range(max(0, i - 2), min(board_size, i + 3)):
+                        near_row = near_stone[ni]
+                        for nj in range(max(0, j - 2), min(board_size, j + 3)):
+                            near_row[nj] = True
+        
+        # 获取有效位置：优先考虑棋子附近的空位
         valid_moves = []
+        near_moves = []
         for i in range(board_size):
+            row = board[i]
+            forbidden_row = forbidden_mask[i]
+            near_row = near_stone[i]
             for j in range(board_size):
-                if board[i][j] == 0 and (i, j) not in forbidden_points:
+                if row[j] == 0 and not forbidden_row[j]:
                     valid_moves.append((i, j))
+                    if near_row[j]:
+                        near_moves.append((i, j))
+        
+        # 空棋盘（或附近已无空位）时退回全盘搜索，此时位置评分会选中中心
+        if near_moves:
+            valid_moves = near_moves
         
         if not valid_moves:
             return None, "无有效落子点"
@@ -134,30 +230,57 @@ class SmartGomokuAI:
         # 评估每个位置
         best_move = None
         best_score = float('-inf')
-        best_reasoning = ""
+        best_reason = 0
         
-        for move in valid_moves:
-            x, y = move
-            score, reason = self.evaluate_move(
-                board, x, y, my_value, opponent_value, 
-                my_triplets, opponent_triplets, board_size
-            )
-            
+        scored_moves = self.score_moves(
+            board, valid_moves, my_value, opponent_value,
+            my_triplets, opponent_triplets, board_size
+        )
+        for move, (score, reason) in zip(valid_moves, scored_moves):
             if score > best_score:
                 best_score = score
                 best_move = move
-                best_reasoning = reason
+                best_reason = reason
         
-        return best_move, best_reasoning
+        reasoning = self.describe_move(
+            board, best_move[0], best_move[1], my_value,
+            my_triplets, best_score, best_reason, board_size
+        )
+        return best_move, reasoning
     
-    def evaluate_move(self, board: List[List[int]], x: int, y: int, 
+    def score_moves(self, board: Board, moves: List[Tuple[int, int]],
+                    my_value: int, opponent_value: int,
+                    current_my_triplets: int, current_opponent_triplets: int,
+                    board_size: int) -> List[Tuple[float, int]]:
+        """按顺序评估所有候选点，候选点较多且启用进程池时并行计算"""
+        if self.executor is None or len(moves) < PARALLEL_MIN_MOVES:
+            return [
+                self.evaluate_move(
+                    board, x, y, my_value, opponent_value,
+                    current_my_triplets, current_opponent_triplets, board_size
+                )
+                for x, y in moves
+            ]
+        
+        chunk_size = -(-len(moves) // self.workers)
+        chunks = [
+            (board, moves[i:i + chunk_size], my_value, opponent_value,
+             current_my_triplets, current_opponent_triplets, board_size)
+            for i in range(0, len(moves), chunk_size)
+        ]
+        scored_moves = []
+        for chunk_scores in self.executor.map(_score_chunk, chunks):
+            scored_moves.extend(chunk_scores)
+        return scored_moves
+    
+    def evaluate_move(self, board: Board, x: int, y: int, 
                      my_value: int, opponent_value: int,
                      current_my_triplets: int, current_opponent_triplets: int,
-                     board_size: int) -> Tuple[float, str]:
-        """评估某个位置的价值"""
+                     board_size: int) -> Tuple[float, int]:
+        """评估某个位置的价值，返回评分和落子理由标志位"""
         
         score = 0.0
-        reasons = []
+        reason = 0
         
         # 模拟落子
         board[x][y] = my_value
@@ -168,10 +291,10 @@ class SmartGomokuAI:
             potential_total = current_my_triplets + new_triplets
             if potential_total >= 2:
                 score += 10000  # 直接获胜
-                reasons.append(f"获胜之手！形成第{potential_total}个三子连珠")
+                reason |= REASON_WIN
             else:
                 score += new_triplets * 500  # 形成三子连珠很重要
-                reasons.append(f"形成{new_triplets}个三子连珠")
+                reason |= REASON_TRIPLET
         
         # 2. 检查是否能阻止对手获胜
         board[x][y] = opponent_value
@@ -180,16 +303,16 @@ class SmartGomokuAI:
             potential_opponent_total = current_opponent_triplets + opponent_new_triplets
             if potential_opponent_total >= 2:
                 score += 8000  # 必须防守！
-                reasons.append("阻止对手获胜")
+                reason |= REASON_BLOCK_WIN
             else:
                 score += opponent_new_triplets * 300
-                reasons.append(f"阻止对手形成三子连珠")
+                reason |= REASON_BLOCK_TRIPLET
         
         # 恢复落子为我方
         board[x][y] = my_value
         
         # 3. 评估连续棋子数量（为形成三子连珠做准备）
-        for dx, dy in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+        for dx, dy in DIRECTIONS:
             my_consecutive = self.count_consecutive(board, x, y, dx, dy, my_value, board_size)
             opponent_consecutive = self.count_consecutive(board, x, y, dx, dy, opponent_value, board_size)
             
@@ -216,70 +339,77 @@ class SmartGomokuAI:
         # 恢复棋盘
         board[x][y] = 0
         
-        reasoning = "; ".join(reasons) if reasons else f"位置评分: {score:.1f}"
-        return score, reasoning
+        return score, reason
     
-    def count_new_triplets_at(self, board: List[List[int]], x: int, y: int, 
-                              player_value: int, board_size: int) -> int:
-        """计算在(x,y)位置能形成多少个新的三子连珠"""
-        new_triplets = set()
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
+    def describe_move(self, board: Board, x: int, y: int, my_value: int,
+                      current_my_triplets: int, score: float, reason: int,
+                      board_size: int) -> str:
+        """将落子理由标志位转换为说明文字"""
+        reasons = []
         
-        for dx, dy in directions:
-            consecutive_positions = self.get_consecutive_positions(
-                board, x, y, dx, dy, player_value, board_size
-            )
-            
-            # 如果有3个或以上连续，检查所有三子组合
-            if len(consecutive_positions) >= 3:
-                for i in range(len(consecutive_positions) - 2):
-                    triplet = tuple(sorted(consecutive_positions[i:i+3]))
-                    new_triplets.add(triplet)
+        if reason & (REASON_WIN | REASON_TRIPLET):
+            board[x][y] = my_value
+            new_triplets = self.count_new_triplets_at(board, x, y, my_value, board_size)
+            board[x][y] = 0
+            if reason & REASON_WIN:
+                reasons.append(f"获胜之手！形成第{current_my_triplets + new_triplets}个三子连珠")
+            else:
+                reasons.append(f"形成{new_triplets}个三子连珠")
         
-        return len(new_triplets)
+        if reason & REASON_BLOCK_WIN:
+            reasons.append("阻止对手获胜")
+        elif reason & REASON_BLOCK_TRIPLET:
+            reasons.append("阻止对手形成三子连珠")
+        
+        return "; ".join(reasons) if reasons else f"位置评分: {score:.1f}"
     
-    def count_triplets(self, board: List[List[int]], player_value: int, board_size: int) -> int:
-        """统计当前棋盘上的三子连珠数量"""
-        triplets = set()
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
+    def count_new_triplets_at(self, board: Board, x: int, y: int, 
+                              player_value: int, board_size: int) -> int:
+        """计算在(x,y)位置能形成多少个新的三子连珠"""
+        new_triplets = 0
         
-        for i in range(board_size):
-            for j in range(board_size):
-                if board[i][j] == player_value:
-                    for dx, dy in directions:
-                        consecutive = self.get_consecutive_positions(
-                            board, i, j, dx, dy, player_value, board_size
-                        )
-                        if len(consecutive) >= 3:
-                            for k in range(len(consecutive) - 2):
-                                triplet = tuple(sorted(consecutive[k:k+3]))
-                                triplets.add(triplet)
-        
-        return len(triplets)
+        for dx, dy in DIRECTIONS:
+            # 与服务器一致：连续n子(n>=3)按滑动窗口计为n-2个三子组合。
+            # 同一方向的各窗口互不相同，不同方向只共享(x,y)一点，因此无需去重
+            consecutive = self.count_consecutive(board, x, y, dx, dy, player_value, board_size)
+            if consecutive >= 3:
+                new_triplets += consecutive - 2
+        
+        return new_triplets
     
-    def get_consecutive_positions(self, board: List[List[int]], x: int, y: int,
-                                  dx: int, dy: int, player_value: int, 
-                                  board_size: int) -> List[Tuple[int, int]]:
-        """获取某个方向上的连续棋子位置"""
-        positions = [(x, y)]
+    def count_triplets(self, board: Board, player_value: int, board_size: int) -> int:
+        """统计当前棋盘上的三子连珠数量
         
-        # 正向
-        nx, ny = x + dx, y + dy
-        while 0 <= nx < board_size and 0 <= ny < board_size and board[nx][ny] == player_value:
-            positions.append((nx, ny))
-            nx += dx
-            ny += dy
+        与服务器一致，每条长度为n(n>=3)的连续段计为n-2个首尾相接的三子连珠。
+        只从每段的起点向前数一次，无需收集位置、排序或去重。
+        """
+        count = 0
         
-        # 反向
-        nx, ny = x - dx, y - dy
-        while 0 <= nx < board_size and 0 <= ny < board_size and board[nx][ny] == player_value:
-            positions.append((nx, ny))
-            nx -= dx
-            ny -= dy
+        for dx, dy in DIRECTIONS:
+            for i in range(board_size):
+                row = board[i]
+                for j in range(board_size):
+                    if row[j] != player_value:
+                        continue
+                    
+                    # 前一格也是本方棋子时，该位置不是连续段的起点
+                    px, py = i - dx, j - dy
+                    if 0 <= px < board_size and 0 <= py < board_size and board[px][py] == player_value:
+                        continue
+                    
+                    length = 1
+                    nx, ny = i + dx, j + dy
+                    while 0 <= nx < board_size and 0 <= ny < board_size and board[nx][ny] == player_value:
+                        length += 1
+                        nx += dx
+                        ny += dy
+                    
+                    if length >= 3:
+                        count += length - 2
         
-        return positions
+        return count
     
-    def count_consecutive(self, board: List[List[int]], x: int, y: int,
+    def count_consecutive(self, board: Board, x: int, y: int,
                          dx: int, dy: int, player_value: int, board_size: int) -> int:
         """计算某个方向上的连续棋子数"""
         count = 1
@@ -300,16 +430,13 @@ class SmartGomokuAI:
         
         return count
     
-    def count_neighbors(self, board: List[List[int]], x: int, y: int, board_size: int) -> int:
+    def count_neighbors(self, board: Board, x: int, y: int, board_size: int) -> int:
         """计算周围8个方向有多少个棋子"""
         count = 0
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < board_size and 0 <= ny < board_size and board[nx][ny] != 0:
-                    count += 1
+        for dx, dy in NEIGHBOR_OFFSETS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < board_size and 0 <= ny < board_size and board[nx][ny] != 0:
+                count += 1
         return count
     
     def get_info(self) -> Dict:
@@ -330,21 +457,41 @@ class SmartGomokuAI:
 # 全局AI实例
 ai_instance: Optional[SmartGomokuAI] = None
 
+# 进程池工作进程内的AI实例，只用于评估候选点
+_worker_ai: Optional[SmartGomokuAI] = None
+
+def _init_worker():
+    """进程池工作进程初始化"""
+    global _worker_ai
+    _worker_ai = SmartGomokuAI("worker", "worker")
+
+def _score_chunk(args) -> List[Tuple[float, int]]:
+    """在工作进程中评估一组候选点"""
+    board, moves, my_value, opponent_value, my_triplets, opponent_triplets, board_size = args
+    return [
+        _worker_ai.evaluate_move(
+            board, x, y, my_value, opponent_value,
+            my_triplets, opponent_triplets, board_size
+        )
+        for x, y in moves
+    ]
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """健康检查"""
-    return jsonify({
+    body = json.dumps({
         "status": "healthy",
         "ai_id": ai_instance.ai_id if ai_instance else "unknown",
         "active_games": len(ai_instance.active_games) if ai_instance else 0
-    })
+    }, ensure_ascii=False)
+    return app.response_class(body, mimetype='application/json')
 
 @app.route('/info', methods=['GET'])
 def get_info():
     """获取AI信息"""
     if not ai_instance:
         return jsonify({"error": "AI not initialized"}), 500
-    return jsonify(ai_instance.get_info())
+    return app.response_class(ai_instance.info_body, mimetype='application/json')
 
 @app.route('/join_game', methods=['POST'])
 def join_game():
@@ -428,22 +575,31 @@ def main():
     parser.add_argument('--port', type=int, default=21000, help='监听端口 (默认: 21000)')
     parser.add_argument('--ai_id', type=str, default='SmartAI_Alpha', help='AI ID')
     parser.add_argument('--ai_name', type=str, default='智能AI Alpha', help='AI名称')
+    parser.add_argument('--unix_socket', type=str, default=None,
+                        help='改为监听Unix域套接字路径，供同机对战平台直连 (例如 /tmp/ai_alpha.sock)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='并行评估候选点的进程数 (默认: 1，即不启用进程池)')
     parser.add_argument('--debug', action='store_true', help='启用调试模式')
     
     args = parser.parse_args()
     
     global ai_instance
-    ai_instance = SmartGomokuAI(args.ai_id, args.ai_name)
+    ai_instance = SmartGomokuAI(args.ai_id, args.ai_name, workers=args.workers)
     
     print(f"启动智能五子棋AI服务...")
     print(f"AI ID: {args.ai_id}")
     print(f"AI名称: {args.ai_name}")
     print(f"端口: {args.port}")
+    print(f"评估进程数: {args.workers}")
     print(f"调试模式: {args.debug}")
     print(f"\n核心策略: 三子连珠获胜机制")
-    print(f"API地址: http://localhost:{args.port}")
     
-    app.run(host='0.0.0.0', port=args.port, debug=args.debug, threaded=True)
+    if args.unix_socket:
+        print(f"API地址: unix://{args.unix_socket}")
+        app.run(host=f"unix://{args.unix_socket}", debug=args.debug, threaded=True)
+    else:
+        print(f"API地址: http://localhost:{args.port}")
+        app.run(host='0.0.0.0', port=args.port, debug=args.debug, threaded=True)
 
 if __name__ == '__main__':
     main()
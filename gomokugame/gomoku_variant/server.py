@@ -3,52 +3,109 @@
 
 import json
 import argparse
+import functools
 import uuid
 import random
-from datetime import datetime
-from flask import Flask, request, jsonify
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import Flask, Response, request, jsonify
 from typing import Dict, List, Tuple, Optional, Set
 
 app = Flask(__name__)
 
+def json_response(payload) -> Response:
+    """直接序列化为紧凑JSON响应，用于高频查询接口，跳过 jsonify 的额外处理"""
+    return Response(json.dumps(payload, separators=(",", ":")), mimetype="application/json")
+
+# 四个检测方向
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+@functools.lru_cache(maxsize=8)
+def build_line_windows(board_size: int) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    """为每个位置生成经过该点的所有三子窗口 (三子连珠编号, 窗口掩码)
+    
+    三子连珠编号为 起点位置*4+方向序号，窗口掩码为三个位置对应的位。
+    表只与棋盘大小有关，每个进程按尺寸计算一次，由所有对局共享。
+    """
+    n = board_size
+    line_windows = [[] for _ in range(n * n)]
+    for direction, (dx, dy) in enumerate(DIRECTIONS):
+        for x in range(n):
+            for y in range(n):
+                if not (0 <= x + 2 * dx < n and 0 <= y + 2 * dy < n):
+                    continue
+                cells = [(x + k * dx) * n + (y + k * dy) for k in range(3)]
+                window = (1 << cells[0]) | (1 << cells[1]) | (1 << cells[2])
+                key = cells[0] * 4 + direction
+                for cell in cells:
+                    line_windows[cell].append((key, window))
+    return tuple(tuple(windows) for windows in line_windows)
+
 class GomokuGame:
     """五子棋游戏类"""
     
+    # 进程内可能同时保存上万局，使用 __slots__ 省去每个实例的 __dict__
+    __slots__ = (
+        "game_id", "player_black", "player_white", "board_size", "board",
+        "current_player", "game_status", "moves_history", "last_move",
+        "created_at", "created_at_ns", "lock",
+        "forbidden_points", "_forbidden_points_list", "forbidden_points_body",
+        "empty_count", "black_triplets", "white_triplets",
+        "bitboards", "line_windows",
+    )
+    
     def __init__(self, game_id: str, player_black: str, player_white: str, board_size: int = 15):
         self.game_id = game_id
         self.player_black = player_black
         self.player_white = player_white
         self.board_size = board_size
-        self.board = [[0 for _ in range(board_size)] for _ in range(board_size)]
+        # 按行展开的一维 bytearray（uint8），(x, y) 位于下标 x*board_size+y，只在序列化时转换为二维列表
+        self.board = bytearray(board_size * board_size)
         self.current_player = "black"  # 黑方先手
         self.game_status = "ongoing"  # ongoing, black_win, white_win, draw
         self.moves_history = []
         self.last_move = None
         self.created_at = datetime.now()
+        # 落子时只记录单调时钟，查询历史时再换算为墙上时间
+        self.created_at_ns = time.monotonic_ns()
+        self.lock = threading.RLock()  # 保护对局状态的并发读写
         
         # 游戏属性
         self.forbidden_points = self._generate_forbidden_points()
+        # 禁手点在对局中不变，预先生成接口返回用的列表
+        self._forbidden_points_list = [[x, y] for x, y in self.forbidden_points]
+        # /forbidden_points 接口的响应体同样不变，创建对局时序列化一次
+        self.forbidden_points_body = json.dumps({
+            "game_id": game_id,
+            "forbidden_points": self._forbidden_points_list,
+            "forbidden_points_count": len(self.forbidden_points)
+        }, separators=(",", ":")).encode("utf-8")
+        # 剩余可落子的空位数（禁手点永远不能落子，不计入）
+        self.empty_count = board_size * board_size - len(self.forbidden_points)
         self.black_triplets = set()  # 黑方的三子连珠集合
         self.white_triplets = set()  # 白方的三子连珠集合
+        
+        # 位棋盘：第 x*board_size+y 位表示该位置有本方棋子，用于按窗口掩码检测三子连珠
+        self.bitboards = {1: 0, 2: 0}
+        # 同尺寸棋盘共享的只读窗口表
+        self.line_windows = build_line_windows(board_size)
     
     def _generate_forbidden_points(self) -> Set[Tuple[int, int]]:
         """生成随机禁手点"""
-        forbidden_points = set()
         total_points = self.board_size * self.board_size
         
         # 生成board_size数量的禁手点
         forbidden_count = min(self.board_size, total_points // 4)  # 最多占棋盘1/4
         
-        while len(forbidden_points) < forbidden_count:
-            x = random.randint(0, self.board_size - 1)
-            y = random.randint(0, self.board_size - 1)
-            forbidden_points.add((x, y))
-        
-        return forbidden_points
+        # 一次性无放回抽样，无需重复抽取去重
+        picks = random.sample(range(total_points), forbidden_count)
+        return {(i // self.board_size, i % self.board_size) for i in picks}
     
     def get_forbidden_points(self) -> List[List[int]]:
-        """获取禁手点列表"""
-        return [[x, y] for x, y in self.forbidden_points]
+        """获取禁手点列表（返回缓存的列表，调用方不应修改）"""
+        return self._forbidden_points_list
     
     def is_valid_move(self, player: str, position: List[int]) -> Tuple[bool, str]:
         """验证落子是否有效"""
@@ -62,7 +119,7 @@ class GomokuGame:
         if not (0 <= x < self.board_size and 0 <= y < self.board_size):
             return False, "Position out of board"
         
-        if self.board[x][y] != 0:
+        if self.board[x * self.board_size + y] != 0:
             return False, "Position already occupied"
         
         # 检查特殊位置
@@ -73,148 +130,138 @@ class GomokuGame:
     
     def make_move(self, player: str, position: List[int]) -> Tuple[bool, str]:
         """执行落子"""
-        is_valid, message = self.is_valid_move(player, position)
-        if not is_valid:
-            return False, message
-        
-        x, y = position
-        player_value = 1 if player == "black" else 2
-        self.board[x][y] = player_value
-        
-        # 记录历史
-        self.moves_history.append({
-            "player": player,
-            "position": position,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        self.last_move = position
-        
-        # 检查特殊位置（虽然前面验证过，但再次确认）
-        if (x, y) in self.forbidden_points:
-            opponent = "white" if player == "black" else "black"
-            self.game_status = f"{opponent}_win"
-            return True, f"{player} hit forbidden point, {opponent} wins"
-        
-        # 检查新的三子连珠
-        new_triplets = self.find_new_triplets(x, y, player_value)
-        if player == "black":
-            self.black_triplets.update(new_triplets)
-        else:
-            self.white_triplets.update(new_triplets)
-        
-        # 检查胜利条件
-        if len(self.black_triplets) >= 2:
-            self.game_status = "black_win"
-        elif len(self.white_triplets) >= 2:
-            self.game_status = "white_win"
-        elif self.is_board_full():
-            self.game_status = "draw"
-        else:
-            # 切换玩家
-            self.current_player = "white" if player == "black" else "black"
-        
-        return True, "Move successful"
-    
-    def find_new_triplets(self, x: int, y: int, player_value: int) -> Set[Tuple[int, int, int, int]]:
-        """寻找新形成的三子连珠"""
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]  # 四个检测方向
-        new_triplets = set()
-        
-        for dx, dy in directions:
-            # 检查这个方向上的连续子
-            consecutive = self.get_consecutive_in_direction(x, y, dx, dy, player_value)
+        with self.lock:
+            if self.game_status != "ongoing":
+                return False, "Game is already over"
             
-            # 如果连续子数>=3，检查是否形成新的三子连珠
-            if len(consecutive) >= 3:
-                # 检查所有可能的三子组合
-                for i in range(len(consecutive) - 2):
-                    triplet = tuple(sorted(consecutive[i:i+3]))
-                    if len(triplet) == 3:
-                        new_triplets.add(triplet)
-        
-        return new_triplets
+            is_valid, message = self.is_valid_move(player, position)
+            if not is_valid:
+                return False, message
+            
+            x, y = position
+            player_value = 1 if player == "black" else 2
+            cell = x * self.board_size + y
+            self.board[cell] = player_value
+            self.bitboards[player_value] |= 1 << cell
+            self.empty_count -= 1
+            
+            # 记录历史
+            self.moves_history.append({
+                "player": player,
+                "position": position,
+                "timestamp_ns": time.monotonic_ns()
+            })
+            
+            self.last_move = position
+            
+            # 检查新的三子连珠
+            new_triplets = self.find_new_triplets(x, y, player_value)
+            if player == "black":
+                self.black_triplets.update(new_triplets)
+            else:
+                self.white_triplets.update(new_triplets)
+            
+            # 检查胜利条件
+            if len(self.black_triplets) >= 2:
+                self.game_status = "black_win"
+            elif len(self.white_triplets) >= 2:
+                self.game_status = "white_win"
+            elif self.is_board_full():
+                self.game_status = "draw"
+            else:
+                # 切换玩家
+                self.current_player = "white" if player == "black" else "black"
+            
+            return True, "Move successful"
     
-    def get_consecutive_in_direction(self, x: int, y: int, dx: int, dy: int, player_value: int) -> List[Tuple[int, int]]:
-        """获取某个方向上连续的棋子"""
-        consecutive = [(x, y)]
+    def find_new_triplets(self, x: int, y: int, player_value: int) -> Set[int]:
+        """寻找新形成的三子连珠
         
-        # 正向检测
-        nx, ny = x + dx, y + dy
-        while (0 <= nx < self.board_size and 0 <= ny < self.board_size and 
-               self.board[nx][ny] == player_value):
-            consecutive.append((nx, ny))
-            nx += dx
-            ny += dy
-        
-        # 反向检测
-        nx, ny = x - dx, y - dy
-        while (0 <= nx < self.board_size and 0 <= ny < self.board_size and 
-               self.board[nx][ny] == player_value):
-            consecutive.append((nx, ny))
-            nx -= dx
-            ny -= dy
-        
-        return consecutive
+        新的三子连珠必然经过刚落下的(x,y)，因此只需检查经过该点的至多12个窗口，
+        窗口内三个位都在本方位棋盘上即构成三子连珠。
+        """
+        bitboard = self.bitboards[player_value]
+        return {
+            key for key, window in self.line_windows[x * self.board_size + y]
+            if bitboard & window == window
+        }
     
     def check_win(self, x: int, y: int, player_value: int) -> bool:
-        """检查是否获胜（保留原方法用于兼容性）"""
-        # 这个方法保留用于兼容
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
+        """检查经过最后落子(x,y)的四条线上是否形成五子连珠（保留原方法用于兼容性）
+        
+        每个方向只向两侧各检查4格，数满5子立即返回。
+        """
+        board = self.board
+        n = self.board_size
         
-        for dx, dy in directions:
+        for dx, dy in DIRECTIONS:
             count = 1
-            
-            # 正向检测
-            nx, ny = x + dx, y + dy
-            while (0 <= nx < self.board_size and 0 <= ny < self.board_size and 
-                   self.board[nx][ny] == player_value):
-                count += 1
-                nx += dx
-                ny += dy
-            
-            # 反向检测
-            nx, ny = x - dx, y - dy
-            while (0 <= nx < self.board_size and 0 <= ny < self.board_size and 
-                   self.board[nx][ny] == player_value):
-                count += 1
-                nx -= dx
-                ny -= dy
-            
-            if count >= 5:
-                return True
+            for step_x, step_y in ((dx, dy), (-dx, -dy)):
+                nx, ny = x + step_x, y + step_y
+                for _ in range(4):
+                    if not (0 <= nx < n and 0 <= ny < n) or board[nx * n + ny] != player_value:
+                        break
+                    count += 1
+                    if count >= 5:
+                        return True
+                    nx += step_x
+                    ny += step_y
         
         return False
     
     def is_board_full(self) -> bool:
-        """检查棋盘是否已满"""
-        for row in self.board:
-            if 0 in row:
-                return False
-        return True
+        """检查棋盘是否已满（除禁手点外已无空位）"""
+        return self.empty_count == 0
     
     def get_state(self) -> Dict:
         """获取游戏状态"""
-        return {
-            "current_player": self.current_player,
-            "board": self.board,
-            "last_move": self.last_move,
-            "game_status": self.game_status,
-            "black_triplets_count": len(self.black_triplets),
-            "white_triplets_count": len(self.white_triplets),
-            "forbidden_points": self.get_forbidden_points(),
-        }
+        with self.lock:
+            return {
+                "current_player": self.current_player,
+                "board": [
+                    list(self.board[row_start:row_start + self.board_size])
+                    for row_start in range(0, len(self.board), self.board_size)
+                ],
+                "last_move": self.last_move,
+                "game_status": self.game_status,
+                "black_triplets_count": len(self.black_triplets),
+                "white_triplets_count": len(self.white_triplets),
+                "forbidden_points": self.get_forbidden_points(),
+            }
     
     def get_history(self) -> Dict:
         """获取历史记录"""
+        with self.lock:
+            moves = list(self.moves_history)
+        
         return {
-            "moves": self.moves_history
+            "moves": [
+                {
+                    "player": move["player"],
+                    "position": move["position"],
+                    "timestamp": (self.created_at + timedelta(
+                        microseconds=(move["timestamp_ns"] - self.created_at_ns) // 1000
+                    )).isoformat()
+                }
+                for move in moves
+            ]
         }
 
 # 全局游戏存储
-games: Dict[str, GomokuGame] = {}
+# 按最近访问排序，超过 MAX_GAMES 时淘汰最久未访问的对局，避免内存无限增长
+games: "OrderedDict[str, GomokuGame]" = OrderedDict()
+games_lock = threading.RLock()  # 保护 games 字典的增删查
+MAX_GAMES = 10000
 BOARD_SIZE = 15  # 默认棋盘大小
 
+def find_game(game_id: str) -> Optional[GomokuGame]:
+    """查找对局并标记为最近访问"""
+    with games_lock:
+        game = games.get(game_id)
+        if game is not None:
+            games.move_to_end(game_id)
+        return game
+
 @app.route('/games', methods=['POST'])
 def create_game():
     """创建新游戏"""
@@ -231,7 +278,10 @@ def create_game():
         
         game_id = f"gomoku_{str(uuid.uuid4())[:8]}"
         game = GomokuGame(game_id, player_black, player_white, BOARD_SIZE)
-        games[game_id] = game
+        with games_lock:
+            games[game_id] = game
+            while len(games) > MAX_GAMES:
+                games.popitem(last=False)
         
         return jsonify({
             "game_id": game_id,
@@ -246,29 +296,26 @@ def create_game():
 @app.route('/games/<game_id>/state', methods=['GET'])
 def get_game_state(game_id):
     """获取游戏状态"""
-    if game_id not in games:
+    game = find_game(game_id)
+    if game is None:
         return jsonify({"error": "Game not found"}), 404
     
-    game = games[game_id]
-    return jsonify(game.get_state())
+    return json_response(game.get_state())
 
 @app.route('/games/<game_id>/forbidden_points', methods=['GET'])
 def get_forbidden_points(game_id):
     """获取特殊位置信息"""
-    if game_id not in games:
+    game = find_game(game_id)
+    if game is None:
         return jsonify({"error": "Game not found"}), 404
     
-    game = games[game_id]
-    return jsonify({
-        "game_id": game_id,
-        "forbidden_points": game.get_forbidden_points(),
-        "forbidden_points_count": len(game.forbidden_points)
-    })
+    return Response(game.forbidden_points_body, mimetype="application/json")
 
 @app.route('/games/<game_id>/move', methods=['POST'])
 def make_move(game_id):
     """提交落子"""
-    if game_id not in games:
+    game = find_game(game_id)
+    if game is None:
         return jsonify({"error": "Game not found"}), 404
     
     try:
@@ -288,15 +335,18 @@ def make_move(game_id):
         if not isinstance(position, list) or len(position) != 2:
             return jsonify({"error": "Position must be a list with 2 elements"}), 400
         
-        game = games[game_id]
-        success, message = game.make_move(player, position)
+        with game.lock:
+            success, message = game.make_move(player, position)
+            game_status = game.game_status
+            black_triplets_count = len(game.black_triplets)
+            white_triplets_count = len(game.white_triplets)
         
         if success:
             return jsonify({
                 "status": "valid_move",
-                "game_status": game.game_status,
-                "black_triplets_count": len(game.black_triplets),
-                "white_triplets_count": len(game.white_triplets)
+                "game_status": game_status,
+                "black_triplets_count": black_triplets_count,
+                "white_triplets_count": white_triplets_count
             })
         else:
             return jsonify({
@@ -310,11 +360,11 @@ def make_move(game_id):
 @app.route('/games/<game_id>/history', methods=['GET'])
 def get_game_history(game_id):
     """获取游戏历史"""
-    if game_id not in games:
+    game = find_game(game_id)
+    if game is None:
         return jsonify({"error": "Game not found"}), 404
     
-    game = games[game_id]
-    return jsonify(game.get_history())
+    return json_response(game.get_history())
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -338,6 +388,7 @@ def main():
     parser = argparse.ArgumentParser(description='五子棋HTTP服务器')
     parser.add_argument('--port', type=int, default=9001, help='监听端口 (默认: 9001)')
     parser.add_argument('--board_size', type=int, default=15, help='棋盘大小 (默认: 15)')
+    parser.add_argument('--threads', type=int, default=16, help='waitress 工作线程数 (默认: 16)')
     parser.add_argument('--debug', action='store_true', help='启用调试模式')
     
     args = parser.parse_args()
@@ -345,12 +396,27 @@ def main():
     global BOARD_SIZE
     BOARD_SIZE = args.board_size
     
+    # 启动时预先生成该尺寸的三子窗口表，避免第一局对局承担建表开销
+    build_line_windows(BOARD_SIZE)
+    
     print(f"启动五子棋服务器...")
     print(f"端口: {args.port}")
     print(f"棋盘大小: {BOARD_SIZE}x{BOARD_SIZE}")
     print(f"调试模式: {args.debug}")
     
-    app.run(host='0.0.0.0', port=args.port, debug=args.debug)
+    if args.debug:
+        app.run(host='0.0.0.0', port=args.port, debug=True)
+        return
+    
+    # 对局状态保存在进程内存中，因此使用单进程多线程的 waitress，而不是多进程 worker
+    try:
+        from waitress import serve
+    except ImportError:
+        print("未安装 waitress，使用 Flask 内置多线程服务器 (pip install waitress 可提升并发性能)")
+        app.run(host='0.0.0.0', port=args.port, threaded=True)
+    else:
+        print(f"WSGI服务器: waitress ({args.threads} 线程)")
+        serve(app, host='0.0.0.0', port=args.port, threads=args.threads)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -15,10 +15,12 @@ import logging
 import json
 import random
 import math
+import threading
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional, Any
-from collections import defaultdict
-from itertools import combinations
+from collections import OrderedDict, deque
+from functools import lru_cache
+from itertools import combinations, combinations_with_replacement
 
 app = Flask(__name__)
 
@@ -29,168 +31,298 @@ logging.basicConfig(
 )
 logger = logging.getLogger('demo1_AI')
 
+AI_NAME = "demo1_AI"
+
+# Card encoding (Cactus Kev style):
+#   bits 16-28: one bit per rank, bits 12-15: suit, bits 8-11: rank index, bits 0-7: rank prime
+RANK_CHARS = '23456789TJQKA'
+RANK_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+SUIT_BITS = {'s': 0x1000, 'h': 0x2000, 'd': 0x4000, 'c': 0x8000}
+# Numeric rank (2-14) indexed by the ASCII code of the rank character, 0 for anything else
+RANK_OF = bytearray(RANK_CHARS.find(chr(code)) + 2 if chr(code) in RANK_CHARS else 0 for code in range(128))
+CARD_INT = {
+    rank_char + suit: (1 << (16 + i)) | suit_bit | (i << 8) | RANK_PRIMES[i]
+    for i, rank_char in enumerate(RANK_CHARS)
+    for suit, suit_bit in SUIT_BITS.items()
+}
+DECK_INTS = tuple(CARD_INT.values())
+# Rank masks (bit r set for rank r, 2-14) of the ten straights, the wheel A-2-3-4-5 included
+STRAIGHT_MASKS = frozenset(
+    [sum(1 << r for r in range(high - 4, high + 1)) for high in range(6, 15)]
+    + [(1 << 14) | (1 << 2) | (1 << 3) | (1 << 4) | (1 << 5)]
+)
+# Random runouts per equity estimate
+MONTE_CARLO_SAMPLES = 1000
+
+# Columns of the per-opponent counter list
+STAT_HANDS_PLAYED, STAT_VPIP, STAT_PFR, STAT_AGGRESSION, STAT_FOLD_TO_BET = range(5)
+STAT_NAMES = ('hands_played', 'vpip', 'pfr', 'aggression', 'fold_to_bet')
+RECENT_ACTIONS_KEPT = 10
+
+# Action type bit flags, looked up once per action instead of repeated string comparisons
+ACTION_FOLD, ACTION_CHECK, ACTION_CALL, ACTION_RAISE, ACTION_ALL_IN = 1, 2, 4, 8, 16
+ACTION_BITS = {
+    'fold': ACTION_FOLD,
+    'check': ACTION_CHECK,
+    'call': ACTION_CALL,
+    'raise': ACTION_RAISE,
+    'all_in': ACTION_ALL_IN,
+}
+VPIP_ACTIONS = ACTION_CALL | ACTION_RAISE | ACTION_ALL_IN
+AGGRESSIVE_ACTIONS = ACTION_RAISE | ACTION_ALL_IN
+
+
+def _hand_category(a: int, b: int, c: int, d: int, e: int, is_flush: bool) -> int:
+    """Category of a 5-card hand (0=high card, 8=straight flush) from ascending ranks"""
+    is_straight = ((1 << a) | (1 << b) | (1 << c) | (1 << d) | (1 << e)) in STRAIGHT_MASKS
+    
+    if is_straight and is_flush:
+        return 8  # Straight flush
+    if a == d or b == e:
+        return 7  # Four of a kind
+    if (a == c and d == e) or (a == b and c == e):
+        return 6  # Full house
+    if is_flush:
+        return 5  # Flush
+    if is_straight:
+        return 4  # Straight
+    if a == c or b == d or c == e:
+        return 3  # Three of a kind
+    pairs = (a == b) + (b == c) + (c == d) + (d == e)
+    if pairs == 2:
+        return 2  # Two pair
+    if pairs == 1:
+        return 1  # One pair
+    return 0  # High card
+
+
+def _hand_value(ranks: Tuple[int, ...], is_flush: bool) -> int:
+    """Comparable value of a 5-card hand: category in the high bits, tie-break ranks below"""
+    a, b, c, d, e = sorted(ranks)
+    category = _hand_category(a, b, c, d, e, is_flush)
+    if category in (4, 8):
+        # Straights only compare by top card; the wheel (A-2-3-4-5) tops out at 5
+        order = [5 if e == 14 and d == 5 else e]
+    else:
+        counts = {r: ranks.count(r) for r in ranks}
+        order = sorted(counts, key=lambda r: (counts[r], r), reverse=True)
+    value = category
+    for rank in order + [0] * (5 - len(order)):
+        value = (value << 4) | rank
+    return value
+
+
+def _build_rank_tables() -> Tuple[Dict[int, int], Dict[int, int]]:
+    """Enumerate every distinct 5-card rank pattern once (7462 hand classes)"""
+    flush_ranks = {}
+    unsuited_ranks = {}
+    for idx in combinations_with_replacement(range(13), 5):
+        if any(idx.count(i) > 4 for i in idx):
+            continue
+        ranks = tuple(i + 2 for i in idx)
+        key = 1
+        for i in idx:
+            key *= RANK_PRIMES[i]
+        unsuited_ranks[key] = _hand_value(ranks, False)
+        if len(set(idx)) == 5:
+            flush_ranks[sum(1 << i for i in idx)] = _hand_value(ranks, True)
+    return flush_ranks, unsuited_ranks
+
+
+def _chen_strength(high_card: int, low_card: int, suited: bool) -> float:
+    """Pre-flop strength (0-1) from the Chen formula"""
+    # Base score for highest card
+    if high_card == 14:  # Ace
+        score = 10
+    elif high_card == 13:  # King
+        score = 8
+    elif high_card == 12:  # Queen
+        score = 7
+    elif high_card == 11:  # Jack
+        score = 6
+    else:
+        score = high_card / 2
+    
+    # Pair bonus
+    if high_card == low_card:
+        score = score * 2 if score * 2 >= 5 else 5
+        if high_card >= 10:
+            score += 2
+    
+    # Suited bonus
+    if suited:
+        score += 2
+    
+    # Gap penalty
+    gap = high_card - low_card - 1
+    if gap == 1:
+        score -= 1
+    elif gap == 2:
+        score -= 2
+    elif gap == 3:
+        score -= 4
+    elif gap >= 4:
+        score -= 5
+    
+    # Straight potential
+    if gap <= 3 and low_card >= 5:
+        score += 1
+    
+    # Normalize to 0-1 range
+    return score / 20 if score < 20 else 1.0
+
+
+def _build_preflop_table() -> List[float]:
+    """Chen strength of every starting-hand class, indexed by (high << 5) | (low << 1) | suited"""
+    table = [0.0] * (15 << 5)
+    for high_card in range(2, 15):
+        for low_card in range(2, high_card + 1):
+            for suited in (0, 1):
+                table[(high_card << 5) | (low_card << 1) | suited] = _chen_strength(high_card, low_card, bool(suited))
+    return table
+
+
+PREFLOP_STRENGTH = _build_preflop_table()
+
+# Starting-hand class flags, same (high << 5) | (low << 1) | suited index as PREFLOP_STRENGTH
+HAND_PREMIUM = 1
+HAND_STRONG = 2
+
+
+def _build_hand_class_flags() -> bytearray:
+    """Premium/strong flags of every starting-hand class"""
+    flags = bytearray(15 << 5)
+    for high_card in range(2, 15):
+        for low_card in range(2, high_card + 1):
+            for suited in (0, 1):
+                is_pair = high_card == low_card
+                flag = 0
+                # Pocket pairs AA, KK, QQ; AK suited or unsuited
+                if (is_pair and high_card >= 12) or (high_card == 14 and low_card == 13):
+                    flag |= HAND_PREMIUM
+                # High pairs, high suited connectors, broadway cards
+                if ((is_pair and high_card >= 9)
+                        or (suited and (low_card >= 10 or high_card - low_card <= 1))
+                        or low_card >= 10):
+                    flag |= HAND_STRONG
+                flags[(high_card << 5) | (low_card << 1) | suited] = flag
+    return flags
+
+
+HAND_CLASS_FLAGS = _build_hand_class_flags()
+
+
+# Keyed by OR of rank bits for flushes, by product of rank primes otherwise
+FLUSH_RANKS, UNSUITED_RANKS = _build_rank_tables()
+
+
+def _eval5(c0: int, c1: int, c2: int, c3: int, c4: int) -> int:
+    """Value of a 5-card hand given as encoded card ints"""
+    if c0 & c1 & c2 & c3 & c4 & 0xF000:
+        return FLUSH_RANKS[(c0 | c1 | c2 | c3 | c4) >> 16]
+    return UNSUITED_RANKS[(c0 & 0xFF) * (c1 & 0xFF) * (c2 & 0xFF) * (c3 & 0xFF) * (c4 & 0xFF)]
+
+
+# Positions of every 5-card subset of a 5, 6 or 7 card hand (21 entries for 7 cards)
+COMBO_INDEXES = {n: tuple(combinations(range(n), 5)) for n in (5, 6, 7)}
+
+
+def _eval7(cards: List[int]) -> int:
+    """Best 5-card value among 5 to 7 encoded card ints"""
+    indexes = COMBO_INDEXES.get(len(cards)) or tuple(combinations(range(len(cards)), 5))
+    # Hot loop: only prime products are needed unless five cards share a suit,
+    # so rank every subset as unsuited and handle flushes separately below
+    unsuited_ranks = UNSUITED_RANKS
+    primes = [card & 0xFF for card in cards]
+    best = 0
+    for i0, i1, i2, i3, i4 in indexes:
+        value = unsuited_ranks[primes[i0] * primes[i1] * primes[i2] * primes[i3] * primes[i4]]
+        if value > best:
+            best = value
+    
+    # A flush (which outranks any unsuited value of the same cards) needs five of one suit
+    suits = [card & 0xF000 for card in cards]
+    for suit_bit in SUIT_BITS.values():
+        if suits.count(suit_bit) >= 5:
+            suited = [card for card in cards if card & suit_bit]
+            for combo in combinations(suited, 5):
+                value = FLUSH_RANKS[(combo[0] | combo[1] | combo[2] | combo[3] | combo[4]) >> 16]
+                if value > best:
+                    best = value
+    return best
+
 class PokerAI:
     def __init__(self):
-        self.name = "demo1_AI"
-        self.opponent_stats = defaultdict(lambda: {
-            'hands_played': 0,
-            'vpip': 0,  # Voluntarily Put money In Pot
-            'pfr': 0,   # Pre-Flop Raise
-            'aggression': 0,
-            'fold_to_bet': 0,
-            'recent_actions': []
-        })
-        self.hand_history = []
+        self.name = AI_NAME
+        # player_id -> (counters indexed by STAT_* columns, ring buffer of recent actions)
+        # vpip: Voluntarily Put money In Pot, pfr: Pre-Flop Raise
+        self._opponents: Dict[str, Tuple[List[int], deque]] = {}
+        self.hands_analyzed = 0
+        self.lock = threading.Lock()  # serializes decisions within one game
+    
+    @property
+    def opponent_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Opponent statistics as plain dicts (for reporting)"""
+        return {
+            player_id: dict(zip(STAT_NAMES, counts), recent_actions=list(recent))
+            for player_id, (counts, recent) in self._opponents.items()
+        }
         
     def evaluate_hand_strength(self, hole_cards: List[str], community_cards: List[str]) -> float:
         """Evaluate hand strength from 0.0 to 1.0"""
-        all_cards = hole_cards + community_cards
+        return PokerAI._hand_strength(tuple(sorted(hole_cards)), tuple(sorted(community_cards)))
+    
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _hand_strength(hole_cards: Tuple[str, ...], community_cards: Tuple[str, ...]) -> float:
+        """Memoized body of evaluate_hand_strength, keyed by sorted card tuples and shared by all games"""
+        hole_cards = list(hole_cards)
+        all_cards = hole_cards + list(community_cards)
         
         if len(community_cards) == 0:
             # Pre-flop hand strength
-            return self._preflop_hand_strength(hole_cards)
+            return PokerAI._preflop_hand_strength(hole_cards)
         else:
             # Post-flop hand strength
-            return self._postflop_hand_strength(all_cards)
+            return PokerAI._postflop_hand_strength(all_cards)
     
-    def _preflop_hand_strength(self, hole_cards: List[str]) -> float:
+    @staticmethod
+    def _preflop_hand_strength(hole_cards: List[str]) -> float:
         """Evaluate pre-flop hand strength using Chen formula and adjustments"""
         if len(hole_cards) != 2:
             return 0.0
             
+        return PREFLOP_STRENGTH[PokerAI._hand_class(hole_cards)]
+    
+    @staticmethod
+    def _hand_class(hole_cards: List[str]) -> int:
+        """Starting-hand class index (high << 5) | (low << 1) | suited of two hole cards"""
         card1, card2 = hole_cards
-        rank1, suit1 = self._parse_card(card1)
-        rank2, suit2 = self._parse_card(card2)
-        
-        # Chen formula base
-        high_card = max(rank1, rank2)
-        low_card = min(rank1, rank2)
-        
-        # Base score for highest card
-        if high_card == 14:  # Ace
-            score = 10
-        elif high_card == 13:  # King
-            score = 8
-        elif high_card == 12:  # Queen
-            score = 7
-        elif high_card == 11:  # Jack
-            score = 6
-        else:
-            score = max(high_card / 2, 0)
+        rank1, suit1 = PokerAI._parse_card(card1)
+        rank2, suit2 = PokerAI._parse_card(card2)
         
-        # Pair bonus
-        if rank1 == rank2:
-            score = max(score * 2, 5)
-            if rank1 >= 10:
-                score += 2
-        
-        # Suited bonus
-        if suit1 == suit2:
-            score += 2
-        
-        # Gap penalty
-        gap = abs(rank1 - rank2) - 1
-        if gap == 1:
-            score -= 1
-        elif gap == 2:
-            score -= 2
-        elif gap == 3:
-            score -= 4
-        elif gap >= 4:
-            score -= 5
-        
-        # Straight potential
-        if gap <= 3 and low_card >= 5:
-            score += 1
-        
-        # Normalize to 0-1 range
-        return min(score / 20, 1.0)
+        high_card, low_card = (rank1, rank2) if rank1 >= rank2 else (rank2, rank1)
+        return (high_card << 5) | (low_card << 1) | (suit1 == suit2)
     
-    def _postflop_hand_strength(self, all_cards: List[str]) -> float:
+    @staticmethod
+    def _postflop_hand_strength(all_cards: List[str]) -> float:
         """Evaluate post-flop hand strength"""
         if len(all_cards) < 5:
             return 0.5
             
-        # Get best 5-card hand
-        best_hand = self._get_best_hand(all_cards)
-        hand_rank = self._rank_hand(best_hand)
+        # Best 5-card hand category via the rank lookup tables
+        hand_rank = _eval7([CARD_INT[card] for card in all_cards]) >> 20
         
         # Normalize hand rank (0-8 scale to 0-1)
         return hand_rank / 8.0
     
-    def _parse_card(self, card: str) -> Tuple[int, str]:
+    @staticmethod
+    def _parse_card(card: str) -> Tuple[int, str]:
         """Parse card string into rank and suit"""
-        rank_map = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, 
-                   '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
-        return rank_map[card[0]], card[1]
-    
-    def _get_best_hand(self, cards: List[str]) -> List[str]:
-        """Get best 5-card hand from available cards"""
-        if len(cards) <= 5:
-            return cards
-        
-        best_hand = None
-        best_rank = -1
-        
-        for combo in combinations(cards, 5):
-            rank = self._rank_hand(list(combo))
-            if rank > best_rank:
-                best_rank = rank
-                best_hand = list(combo)
-        
-        return best_hand or cards[:5]
-    
-    def _rank_hand(self, hand: List[str]) -> int:
-        """Rank a 5-card hand (0=high card, 8=straight flush)"""
-        if len(hand) != 5:
-            return 0
-            
-        ranks = [self._parse_card(card)[0] for card in hand]
-        suits = [self._parse_card(card)[1] for card in hand]
-        
-        ranks.sort(reverse=True)
-        rank_counts = {}
-        for rank in ranks:
-            rank_counts[rank] = rank_counts.get(rank, 0) + 1
-        
-        counts = sorted(rank_counts.values(), reverse=True)
-        is_flush = len(set(suits)) == 1
-        is_straight = self._is_straight(ranks)
-        
-        if is_straight and is_flush:
-            return 8  # Straight flush
-        elif counts == [4, 1]:
-            return 7  # Four of a kind
-        elif counts == [3, 2]:
-            return 6  # Full house
-        elif is_flush:
-            return 5  # Flush
-        elif is_straight:
-            return 4  # Straight
-        elif counts == [3, 1, 1]:
-            return 3  # Three of a kind
-        elif counts == [2, 2, 1]:
-            return 2  # Two pair
-        elif counts == [2, 1, 1, 1]:
-            return 1  # One pair
-        else:
-            return 0  # High card
-    
-    def _is_straight(self, ranks: List[int]) -> bool:
-        """Check if ranks form a straight"""
-        ranks = sorted(set(ranks))
-        if len(ranks) != 5:
-            return False
-        
-        # Check normal straight
-        if ranks[-1] - ranks[0] == 4:
-            return True
-        
-        # Check A-2-3-4-5 straight
-        if ranks == [2, 3, 4, 5, 14]:
-            return True
-        
-        return False
+        rank = RANK_OF[ord(card[0])]
+        if not rank:
+            raise KeyError(card)
+        return rank, card[1]
     
     def calculate_pot_odds(self, pot: int, bet_to_call: int) -> float:
         """Calculate pot odds"""
@@ -200,62 +332,78 @@ class PokerAI:
     
     def estimate_win_probability(self, hole_cards: List[str], community_cards: List[str], 
                                num_opponents: int) -> float:
-        """Estimate win probability using Monte Carlo simulation (simplified)"""
-        hand_strength = self.evaluate_hand_strength(hole_cards, community_cards)
-        
-        # Adjust for number of opponents
-        win_prob = hand_strength ** (num_opponents * 0.5)  # Less aggressive reduction
+        """Estimate win probability using Monte Carlo simulation"""
+        if len(hole_cards) == 2 and num_opponents >= 1:
+            win_prob = self._monte_carlo_equity(hole_cards, community_cards, num_opponents)
+        else:
+            hand_strength = self.evaluate_hand_strength(hole_cards, community_cards)
+            win_prob = hand_strength ** (num_opponents * 0.5)
         
         # Pre-flop adjustments
         if len(community_cards) == 0:
             # High pairs and premium hands
             if self._is_premium_hand(hole_cards):
-                win_prob = max(win_prob, 0.75)
+                win_prob = win_prob if win_prob >= 0.75 else 0.75
             elif self._is_strong_hand(hole_cards):
-                win_prob = max(win_prob, 0.6)
+                win_prob = win_prob if win_prob >= 0.6 else 0.6
+        
+        return win_prob if win_prob <= 0.95 else 0.95
+    
+    def _monte_carlo_equity(self, hole_cards: List[str], community_cards: List[str],
+                            num_opponents: int, samples: int = MONTE_CARLO_SAMPLES) -> float:
+        """Share of random runouts won against random opponent hands (ties count half)"""
+        hero = [CARD_INT[card] for card in hole_cards]
+        board = [CARD_INT[card] for card in community_cards]
+        known = set(hero + board)
+        unknown = [card for card in DECK_INTS if card not in known]
+        missing = 5 - len(board)
+        needed = missing + 2 * num_opponents
+        if missing < 0 or needed > len(unknown):
+            return self.evaluate_hand_strength(hole_cards, community_cards)
+        
+        # From the flop on there are at most C(47, 2) board completions, so the hero's
+        # value repeats across samples; cache it per completion for this estimate
+        hero_values = {}
+        cache_hero = missing <= 2
+        
+        score = 0.0
+        for _ in range(samples):
+            # Sampling only the cards needed is much cheaper than shuffling the deck
+            drawn = random.sample(unknown, needed)
+            completion = drawn[:missing]
+            full_board = board + completion
+            if cache_hero:
+                key = tuple(sorted(completion))
+                hero_value = hero_values.get(key)
+                if hero_value is None:
+                    hero_value = hero_values[key] = _eval7(hero + full_board)
+            else:
+                hero_value = _eval7(hero + full_board)
+            tied = False
+            for i in range(missing, needed, 2):
+                villain_value = _eval7(drawn[i:i + 2] + full_board)
+                if villain_value > hero_value:
+                    break
+                if villain_value == hero_value:
+                    tied = True
+            else:
+                score += 0.5 if tied else 1.0
         
-        return min(win_prob, 0.95)
+        return score / samples
     
     def _is_premium_hand(self, hole_cards: List[str]) -> bool:
         """Check if hand is premium (AA, KK, QQ, AK)"""
         if len(hole_cards) != 2:
             return False
             
-        rank1, suit1 = self._parse_card(hole_cards[0])
-        rank2, suit2 = self._parse_card(hole_cards[1])
-        
-        # Pocket pairs AA, KK, QQ
-        if rank1 == rank2 and rank1 >= 12:
-            return True
-        
-        # AK suited or unsuited
-        if {rank1, rank2} == {14, 13}:
-            return True
-        
-        return False
+        return bool(HAND_CLASS_FLAGS[self._hand_class(hole_cards)] & HAND_PREMIUM)
     
     def _is_strong_hand(self, hole_cards: List[str]) -> bool:
         """Check if hand is strong"""
         if len(hole_cards) != 2:
             return False
             
-        rank1, suit1 = self._parse_card(hole_cards[0])
-        rank2, suit2 = self._parse_card(hole_cards[1])
-        
-        # High pairs
-        if rank1 == rank2 and rank1 >= 9:
-            return True
-        
-        # High suited connectors
-        if suit1 == suit2:
-            if min(rank1, rank2) >= 10 or abs(rank1 - rank2) <= 1:
-                return True
-        
-        # Broadway cards
-        if min(rank1, rank2) >= 10:
-            return True
-        
-        return False
+        return bool(HAND_CLASS_FLAGS[self._hand_class(hole_cards)] & HAND_STRONG)
     
     def analyze_position(self, current_player: str, players: Dict, dealer_index: int) -> str:
         """Analyze position relative to dealer"""
@@ -282,44 +430,45 @@ class PokerAI:
         """Update opponent statistics for modeling"""
         action_history = game_state.get('action_history', [])
         current_phase = game_state.get('phase', 'preflop')
+        is_preflop = current_phase == 'preflop'
         
         for action in action_history:
             player_id = action.get('player_id')
             action_type = action.get('action')
             
             if player_id and player_id != self.name:
-                stats = self.opponent_stats[player_id]
-                stats['hands_played'] += 1
-                stats['recent_actions'].append(action_type)
-                
-                # Keep only recent actions
-                if len(stats['recent_actions']) > 10:
-                    stats['recent_actions'] = stats['recent_actions'][-10:]
+                entry = self._opponents.get(player_id)
+                if entry is None:
+                    entry = self._opponents[player_id] = ([0] * len(STAT_NAMES), deque(maxlen=RECENT_ACTIONS_KEPT))
+                counts, recent = entry
+                counts[STAT_HANDS_PLAYED] += 1
+                # Bounded deque keeps only the most recent actions
+                recent.append(action_type)
+                bits = ACTION_BITS.get(action_type, 0)
                 
                 # Update VPIP (Voluntarily Put money In Pot)
-                if action_type in ['call', 'raise', 'all_in'] and current_phase == 'preflop':
-                    stats['vpip'] += 1
-                
-                # Update PFR (Pre-Flop Raise)
-                if action_type in ['raise', 'all_in'] and current_phase == 'preflop':
-                    stats['pfr'] += 1
+                if bits & VPIP_ACTIONS and is_preflop:
+                    counts[STAT_VPIP] += 1
                 
-                # Update aggression
-                if action_type in ['raise', 'all_in']:
-                    stats['aggression'] += 1
-                elif action_type == 'fold':
-                    stats['fold_to_bet'] += 1
+                # Update aggression and PFR (Pre-Flop Raise)
+                if bits & AGGRESSIVE_ACTIONS:
+                    counts[STAT_AGGRESSION] += 1
+                    if is_preflop:
+                        counts[STAT_PFR] += 1
+                elif bits == ACTION_FOLD:
+                    counts[STAT_FOLD_TO_BET] += 1
     
     def get_opponent_tendency(self, player_id: str) -> str:
         """Get opponent playing tendency"""
-        if player_id not in self.opponent_stats:
+        entry = self._opponents.get(player_id)
+        if entry is None:
             return 'unknown'
         
-        stats = self.opponent_stats[player_id]
-        hands = max(stats['hands_played'], 1)
+        counts = entry[0]
+        hands = max(counts[STAT_HANDS_PLAYED], 1)
         
-        vpip_rate = stats['vpip'] / hands
-        aggression_rate = stats['aggression'] / hands
+        vpip_rate = counts[STAT_VPIP] / hands
+        aggression_rate = counts[STAT_AGGRESSION] / hands
         
         if vpip_rate > 0.3 and aggression_rate > 0.2:
             return 'aggressive'
@@ -330,24 +479,15 @@ class PokerAI:
         else:
             return 'balanced'
     
-    def calculate_bet_size(self, game_state: Dict, action_type: str) -> int:
+    def calculate_bet_size(self, game_state: Dict, action_type: str,
+                           hole_cards: List[str], my_chips: int,
+                           raise_action: Optional[Dict] = None) -> int:
         """Calculate optimal bet size"""
         pot = game_state.get('pot', 0)
         current_bet = game_state.get('current_bet', 0)
-        my_chips = 0
-        
-        players = game_state.get('players', {})
-        for player_id, player_info in players.items():
-            if player_id == game_state.get('current_player'):
-                my_chips = player_info.get('chips', 0)
-                my_current_bet = player_info.get('current_bet', 0)
-                break
         
         if action_type == 'raise':
             # Get valid raise range
-            valid_actions = game_state.get('valid_actions', [])
-            raise_action = next((a for a in valid_actions if a['action'] == 'raise'), None)
-            
             if raise_action and isinstance(raise_action.get('amount'), dict):
                 min_raise = raise_action['amount']['min']
                 max_raise = raise_action['amount']['max']
@@ -360,14 +500,7 @@ class PokerAI:
             half_pot_raise = (pot + current_bet) // 2
             
             # Choose raise size based on hand strength and position
-            hole_cards = []
             community_cards = game_state.get('community_cards', [])
-            
-            for player_id, player_info in players.items():
-                if player_id == game_state.get('current_player'):
-                    hole_cards = player_info.get('hole_cards', [])
-                    break
-            
             hand_strength = self.evaluate_hand_strength(hole_cards, community_cards)
             
             if hand_strength > 0.8:
@@ -397,21 +530,32 @@ class PokerAI:
         # Bluff occasionally on scary boards
         if len(community_cards) >= 3:
             # Check for flush/straight possibilities
-            suits = [card[1] for card in community_cards]
-            ranks = [self._parse_card(card)[0] for card in community_cards]
-            
-            # Flush draw on board
-            if len(set(suits)) <= 2:
+            # OR of the encoded board: rank bits from bit 16 (deuce) to 28 (ace), suit bits 12-15
+            board_bits = 0
+            for card in community_cards:
+                board_bits |= CARD_INT[card]
+            rank_bits = board_bits >> 16
+            
+            # Flush draw on board: at most two suits present
+            if bin(board_bits & 0xF000).count('1') <= 2:
                 return random.random() < 0.3
             
-            # Straight possibilities
-            if max(ranks) - min(ranks) <= 4:
+            # Straight possibilities: highest and lowest board ranks at most 4 apart
+            if rank_bits.bit_length() - (rank_bits & -rank_bits).bit_length() <= 4:
                 return random.random() < 0.25
         
         return random.random() < 0.1
     
+    def _extract_state(self, game_state: Dict) -> Tuple[List[str], int, int, int]:
+        """Read our hole cards, chips and current bet, plus the active player count"""
+        players = game_state.get('players', {})
+        me = players.get(game_state.get('current_player'), {})
+        num_active = sum(1 for p in players.values() if p['state'] == 'active')
+        return me.get('hole_cards', []), me.get('chips', 0), me.get('current_bet', 0), num_active
+    
     def make_decision(self, game_state: Dict) -> Dict[str, Any]:
         """Main decision-making function"""
+        self.hands_analyzed += 1
         try:
             # Update opponent stats
             self.update_opponent_stats(game_state)
@@ -421,18 +565,9 @@ class PokerAI:
                 return {"action": "fold", "amount": 0}
             
             # Get game information
-            hole_cards = []
-            my_chips = 0
-            my_current_bet = 0
             current_player = game_state.get('current_player')
-            
             players = game_state.get('players', {})
-            for player_id, player_info in players.items():
-                if player_id == current_player:
-                    hole_cards = player_info.get('hole_cards', [])
-                    my_chips = player_info.get('chips', 0)
-                    my_current_bet = player_info.get('current_bet', 0)
-                    break
+            hole_cards, my_chips, my_current_bet, num_active = self._extract_state(game_state)
             
             community_cards = game_state.get('community_cards', [])
             pot = game_state.get('pot', 0)
@@ -441,7 +576,7 @@ class PokerAI:
             
             # Calculate hand strength and win probability
             hand_strength = self.evaluate_hand_strength(hole_cards, community_cards)
-            num_opponents = len([p for p in players.values() if p['state'] == 'active']) - 1
+            num_opponents = num_active - 1
             win_prob = self.estimate_win_probability(hole_cards, community_cards, num_opponents)
             
             # Get position
@@ -453,20 +588,25 @@ class PokerAI:
             pot_odds = self.calculate_pot_odds(pot, bet_to_call) if bet_to_call > 0 else float('inf')
             
             # Find available actions
-            fold_action = next((a for a in valid_actions if a['action'] == 'fold'), None)
-            check_action = next((a for a in valid_actions if a['action'] == 'check'), None)
-            call_action = next((a for a in valid_actions if a['action'] == 'call'), None)
-            raise_action = next((a for a in valid_actions if a['action'] == 'raise'), None)
-            all_in_action = next((a for a in valid_actions if a['action'] == 'all_in'), None)
+            # Index valid actions by name once (first entry wins, as with a linear scan)
+            by_action = {}
+            for a in valid_actions:
+                by_action.setdefault(a['action'], a)
+            fold_action = by_action.get('fold')
+            check_action = by_action.get('check')
+            call_action = by_action.get('call')
+            raise_action = by_action.get('raise')
+            all_in_action = by_action.get('all_in')
             
             # Decision logic
-            logger.info(f"Hand: {hole_cards}, Strength: {hand_strength:.3f}, Win prob: {win_prob:.3f}, Position: {position}")
+            logger.info("Hand: %s, Strength: %.3f, Win prob: %.3f, Position: %s",
+                        hole_cards, hand_strength, win_prob, position)
             
             # Premium hands - always aggressive
             if self._is_premium_hand(hole_cards):
                 if raise_action:
-                    amount = self.calculate_bet_size(game_state, 'raise')
-                    logger.info(f"Premium hand - raising to {amount}")
+                    amount = self.calculate_bet_size(game_state, 'raise', hole_cards, my_chips, raise_action)
+                    logger.info("Premium hand - raising to %s", amount)
                     return {"action": "raise", "amount": amount}
                 elif call_action:
                     logger.info("Premium hand - calling")
@@ -478,8 +618,8 @@ class PokerAI:
             # Very strong hands - always bet/raise for value
             elif hand_strength > 0.8 or win_prob > 0.75:
                 if raise_action:
-                    amount = self.calculate_bet_size(game_state, 'raise')
-                    logger.info(f"Very strong hand - raising to {amount}")
+                    amount = self.calculate_bet_size(game_state, 'raise', hole_cards, my_chips, raise_action)
+                    logger.info("Very strong hand - raising to %s", amount)
                     return {"action": "raise", "amount": amount}
                 elif call_action:
                     logger.info("Very strong hand - calling")
@@ -494,8 +634,8 @@ class PokerAI:
                     logger.info("Strong hand - checking in early/middle position")
                     return check_action
                 elif raise_action and (position == 'late' or bet_to_call == 0):
-                    amount = self.calculate_bet_size(game_state, 'raise')
-                    logger.info(f"Strong hand - raising to {amount}")
+                    amount = self.calculate_bet_size(game_state, 'raise', hole_cards, my_chips, raise_action)
+                    logger.info("Strong hand - raising to %s", amount)
                     return {"action": "raise", "amount": amount}
                 elif call_action and pot_odds > 2:
                     logger.info("Strong hand - calling with good pot odds")
@@ -513,8 +653,8 @@ class PokerAI:
                     logger.info("Marginal hand - calling with good pot odds")
                     return call_action
                 elif position == 'late' and self.should_bluff(game_state) and raise_action:
-                    amount = self.calculate_bet_size(game_state, 'raise')
-                    logger.info(f"Marginal hand - bluffing from late position, raising to {amount}")
+                    amount = self.calculate_bet_size(game_state, 'raise', hole_cards, my_chips, raise_action)
+                    logger.info("Marginal hand - bluffing from late position, raising to %s", amount)
                     return {"action": "raise", "amount": amount}
             
             # Weak hands - mostly fold unless great pot odds
@@ -536,15 +676,36 @@ class PokerAI:
             return valid_actions[0]
             
         except Exception as e:
-            logger.error(f"Error in decision making: {e}")
+            logger.error("Error in decision making: %s", e)
             # Safe fallback
             fold_action = next((a for a in valid_actions if a['action'] == 'fold'), None)
             if fold_action:
                 return fold_action
             return valid_actions[0] if valid_actions else {"action": "fold", "amount": 0}
 
-# Global AI instance
-poker_ai = PokerAI()
+# One PokerAI per game so opponent models stay separate; least recently used games are evicted
+MAX_GAMES = 256
+games: "OrderedDict[str, PokerAI]" = OrderedDict()
+games_lock = threading.Lock()
+
+def get_game_ai(game_id: Optional[str]) -> PokerAI:
+    """Return the PokerAI for a game, creating it on first use"""
+    with games_lock:
+        ai = games.get(game_id)
+        if ai is None:
+            ai = games[game_id] = PokerAI()
+            if len(games) > MAX_GAMES:
+                games.popitem(last=False)
+        else:
+            games.move_to_end(game_id)
+        return ai
+
+def warm_up():
+    """Run the evaluation paths once at startup so the first /action does not pay for cold code"""
+    ai = PokerAI()
+    for community_cards in ([], ['Qh', 'Jc', '2s'], ['Qh', 'Jc', '2s', '9d', '9s']):
+        ai.evaluate_hand_strength(['As', 'Kd'], community_cards)
+        ai.estimate_win_probability(['As', 'Kd'], community_cards, 1)
 
 @app.route('/action', methods=['POST'])
 def get_action():
@@ -554,16 +715,18 @@ def get_action():
         if not game_state:
             return jsonify({"error": "No game state provided"}), 400
         
-        logger.info(f"Received game state for hand {game_state.get('hand_number', 'unknown')}")
+        logger.info("Received game state for hand %s", game_state.get('hand_number', 'unknown'))
         
         # Make decision
-        decision = poker_ai.make_decision(game_state)
+        ai = get_game_ai(game_state.get('game_id'))
+        with ai.lock:
+            decision = ai.make_decision(game_state)
         
-        logger.info(f"Decision: {decision}")
+        logger.info("Decision: %s", decision)
         return jsonify(decision)
         
     except Exception as e:
-        logger.error(f"Error processing action request: {e}")
+        logger.error("Error processing action request: %s", e)
         return jsonify({"action": "fold", "amount": 0})
 
 @app.route('/health', methods=['GET'])
@@ -571,24 +734,54 @@ def health_check():
     """Health check endpoint"""
     return jsonify({
         "status": "healthy",
-        "ai_name": poker_ai.name,
+        "ai_name": AI_NAME,
         "timestamp": datetime.now().isoformat()
     })
 
 @app.route('/stats', methods=['GET'])
 def get_stats():
-    """Get AI statistics"""
+    """Get AI statistics for one game (?game_id=..., defaults to the most recent game)"""
+    game_id = request.args.get('game_id')
+    with games_lock:
+        if game_id is None and games:
+            game_id = next(reversed(games))
+        ai = games.get(game_id)
+    opponent_stats, hands_analyzed = {}, 0
+    if ai:
+        # Read under the game's lock so a concurrent decision cannot add an opponent mid-iteration
+        with ai.lock:
+            opponent_stats = ai.opponent_stats
+            hands_analyzed = ai.hands_analyzed
     return jsonify({
-        "ai_name": poker_ai.name,
-        "opponent_stats": dict(poker_ai.opponent_stats),
-        "hands_analyzed": len(poker_ai.hand_history)
+        "ai_name": AI_NAME,
+        "game_id": game_id,
+        "games_tracked": len(games),
+        "opponent_stats": opponent_stats,
+        "hands_analyzed": hands_analyzed
     })
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Demo1 AI - Advanced Texas Hold'em AI")
     parser.add_argument('--port', type=int, default=9013, help='Port to listen on')
     parser.add_argument('--debug', action='store_true', help='Enable debug mode')
+    parser.add_argument('--threads', type=int, default=8, help='Worker threads for the waitress server')
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Logging level; WARNING drops the per-decision log lines')
     args = parser.parse_args()
     
-    logger.info(f"Starting {poker_ai.name} on port {args.port}")
-    app.run(host='0.0.0.0', port=args.port, debug=args.debug)
\ No newline at end of file
+    logging.getLogger().setLevel(args.log_level)
+    logging.getLogger('werkzeug').setLevel(args.log_level)  # per-request access log
+    logger.info(f"Starting {AI_NAME} on port {args.port}")
+    warm_up()
+    if args.debug:
+        app.run(host='0.0.0.0', port=args.port, debug=True)
+    else:
+        # Single process so the per-game opponent models and the lookup tables built at import are shared
+        try:
+            from waitress import serve
+        except ImportError:
+            logger.info("waitress not installed, falling back to the threaded Flask server")
+            app.run(host='0.0.0.0', port=args.port, threaded=True)
+        else:
+            logger.info(f"Serving with waitress ({args.threads} threads)")
+            serve(app, host='0.0.0.0', port=args.port, threads=args.threads)
\ No newline at end of file
@@ -4,6 +4,7 @@ Test script for Demo1 AI
 Tests the AI's decision-making with sample game states
 """
 
+import copy
 import json
 import requests
 import time
@@ -89,7 +90,7 @@ def test_ai_decision_making():
         # Test action endpoint with strong hand
         print("\nTesting action endpoint with strong hand (As Kh)...")
         response = requests.post(f"{url}/action", 
-                               json=test_game_state, 
+                               data=json.dumps(test_game_state), 
                                headers={'Content-Type': 'application/json'},
                                timeout=5)
         
@@ -112,11 +113,11 @@ def test_ai_decision_making():
         
         # Test with weak hand
         print("\nTesting with weak hand (2c 7d)...")
-        weak_hand_state = test_game_state.copy()
+        weak_hand_state = copy.deepcopy(test_game_state)
         weak_hand_state["players"]["demo1_AI"]["hole_cards"] = ["2c", "7d"]
         
         response = requests.post(f"{url}/action", 
-                               json=weak_hand_state, 
+                               data=json.dumps(weak_hand_state), 
                                headers={'Content-Type': 'application/json'},
                                timeout=5)
         
@@ -129,13 +130,13 @@ def test_ai_decision_making():
         
         # Test post-flop scenario
         print("\nTesting post-flop scenario...")
-        postflop_state = test_game_state.copy()
+        postflop_state = copy.deepcopy(test_game_state)
         postflop_state["phase"] = "flop"
         postflop_state["community_cards"] = ["Ac", "Kd", "5h"]
         postflop_state["players"]["demo1_AI"]["hole_cards"] = ["As", "Kh"]  # Two pair
         
         response = requests.post(f"{url}/action", 
-                               json=postflop_state, 
+                               data=json.dumps(postflop_state), 
                                headers={'Content-Type': 'application/json'},
                                timeout=5)
         
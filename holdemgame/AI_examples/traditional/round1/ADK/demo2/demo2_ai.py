@@ -1,7 +1,8 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request
+import json
 import random
 import argparse
-from collections import defaultdict
+from functools import lru_cache
 import time
 
 app = Flask(__name__)
@@ -37,6 +38,40 @@ PRE_FLOP_RANKINGS = {
     ('A', '5', 's'): 7, ('A', '4', 's'): 6, ('A', '3', 's'): 6, ('A', '2', 's'): 6
 }
 
+# Card rank character -> numeric rank
+RANK_TO_INT = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9,
+               'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
+
+def _build_preflop_table():
+    # Resolve PRE_FLOP_RANKINGS for every (high, low, suited) start once, keyed
+    # by (high << 5) | (low << 1) | suited. Lookups use the card characters, so
+    # the result matches the per-decision tuple lookups exactly.
+    table = {}
+    for high_rank, high in RANK_TO_INT.items():
+        for low_rank, low in RANK_TO_INT.items():
+            if low > high:
+                continue
+            for suited in (0, 1):
+                if high == low:
+                    strength = PRE_FLOP_RANKINGS.get((high_rank, low_rank), 5)
+                elif suited:
+                    strength = PRE_FLOP_RANKINGS.get((high_rank, low_rank, 's'), PRE_FLOP_RANKINGS.get((high_rank, low_rank), 3))
+                else:
+                    strength = PRE_FLOP_RANKINGS.get((high_rank, low_rank), 3)
+                table[(high << 5) | (low << 1) | suited] = strength
+    return table
+
+PRE_FLOP_INT = _build_preflop_table()
+
+@lru_cache(maxsize=2048)
+def _preflop_rank(c1, c2):
+    high = RANK_TO_INT[c1[0]]
+    low = RANK_TO_INT[c2[0]]
+    if high < low:
+        high, low = low, high
+    # Pairs resolve to the same entry whether or not the suit bit is set
+    return PRE_FLOP_INT[(high << 5) | (low << 1) | (c1[1] == c2[1])]
+
 # Position multipliers (later positions get higher multipliers)
 POSITION_MULTIPLIERS = {
     'early': 0.8,
@@ -55,40 +90,90 @@ STAGE_MULTIPLIERS = {
     'final': 1.5     # Very aggressive
 }
 
+# Strength added to the preflop rank by board size (flop +1, turn and river +0.5 each);
+# any other size is scored as the river
+STREET_BONUS = {0: 0, 3: 1, 4: 1.5, 5: 2.0}
+
+# Responses slower than this are close to the engine's timeout
+SLOW_RESPONSE_NS = 2_500_000_000
+
+@lru_cache(maxsize=4096)
+def _choose_action(adjusted_strength, position_multiplier, pot_odds, is_short_stack,
+                   can_check, can_call, can_raise, can_all_in, can_fold):
+    # Name of the best-scoring available action, or None if none qualifies. Pure in its
+    # arguments, so repeated spots are answered from the cache. Ties keep the earlier
+    # action in check, call, raise, all_in, fold order.
+    best_action_name = None
+    best_score = float('-inf')
+
+    # Check if we can check
+    if can_check and adjusted_strength > 5:
+        best_action_name, best_score = 'check', adjusted_strength
+
+    # Evaluate call
+    if can_call:
+        # Only call if hand strength is good or pot odds are favorable
+        if adjusted_strength > 6 or (adjusted_strength > 4 and pot_odds < 0.3):
+            call_score = adjusted_strength + (0.5 if pot_odds < 0.2 else 0)
+            if call_score > best_score:
+                best_action_name, best_score = 'call', call_score
+
+    # Evaluate raise
+    if can_raise:
+        # Be more aggressive with strong hands, good position, or when short stacked
+        if adjusted_strength > 8 or (adjusted_strength > 7 and position_multiplier > 1.0) or (is_short_stack and adjusted_strength > 6):
+            strength_score = adjusted_strength
+            # Higher strength leads to higher raise
+            raise_score = strength_score + (position_multiplier - 1.0) * 2
+            if raise_score > best_score:
+                best_action_name, best_score = 'raise', raise_score
+
+    # Evaluate all-in
+    if can_all_in:
+        # Go all-in with very strong hands or as a last resort
+        if adjusted_strength > 9 or (is_short_stack and adjusted_strength > 7):
+            if 10.0 > best_score:  # Highest priority
+                best_action_name, best_score = 'all_in', 10.0
+
+    # Evaluate fold
+    if can_fold:
+        # Fold with weak hands, especially out of position
+        if adjusted_strength < 4 or (adjusted_strength < 5 and position_multiplier < 1.0) or (pot_odds > 0.5 and adjusted_strength < 7):
+            if 1.0 > best_score:  # Lowest priority
+                best_action_name, best_score = 'fold', 1.0
+
+    return best_action_name
+
 class AIStrategy:
+    __slots__ = ('tournament_stage', 'current_blind_level')
+
     def __init__(self):
-        self.opponent_profiles = defaultdict(lambda: {
-            'aggression': 0.5,  # 0-1 scale, 1 being most aggressive
-            'fold_to_raise': 0.5,  # Probability of folding to raise
-            'seen_hands': 0
-        })
         self.tournament_stage = 'early'
         self.current_blind_level = 1
-        self.my_stack_history = []
-        self.opponent_stack_history = defaultdict(list)
 
-    def update_tournament_stage(self, game_state):
-        total_players = len(game_state['players'])
-        active_players = sum(1 for p in game_state['players'].values() if p['state'] == 'active' and not p.get('is_eliminated', False))
-        starting_players = len(game_state['players'])
+    def update_tournament_stage(self, game_state, players=None):
+        if players is None:
+            players = list(game_state['players'].values())
+        total_players = len(players)
+        active_players = sum(1 for p in players if p['state'] == 'active' and not p.get('is_eliminated', False))
 
         # Update stage based on remaining players
         if active_players == 1:
             self.tournament_stage = 'final'
-        elif active_players / starting_players <= 0.3:
+        elif active_players / total_players <= 0.3:
             self.tournament_stage = 'late'
-        elif active_players / starting_players <= 0.6:
+        elif active_players / total_players <= 0.6:
             self.tournament_stage = 'middle'
         else:
             self.tournament_stage = 'early'
 
         # Update blind level based on hand number
-        players_count = len(game_state['players'])
-        hands_per_level = players_count * 2
+        hands_per_level = total_players * 2
         self.current_blind_level = (game_state['hand_number'] // hands_per_level) + 1
 
-    def get_position(self, game_state):
-        players = list(game_state['players'].values())
+    def get_position(self, game_state, players=None):
+        if players is None:
+            players = list(game_state['players'].values())
         current_player_id = game_state['current_player']
         dealer_index = game_state['dealer_index']
         num_players = len(players)
@@ -103,13 +188,8 @@ class AIStrategy:
         if current_index is None:
             return 'early'
 
-        # Determine position relative to dealer
-        positions = []
-        for i in range(num_players):
-            pos_index = (dealer_index + i + 1) % num_players
-            positions.append(players[pos_index]['player_id'])
-
-        pos = positions.index(current_player_id)
+        # Seats after the dealer, counting from 0 at the seat to their left
+        pos = (current_index - dealer_index - 1) % num_players
 
         if num_players <= 6:
             if pos == 0 or pos == 1:  # UTG, UTG+1
@@ -127,67 +207,12 @@ class AIStrategy:
                 return 'late' if pos < num_players - 2 else 'dealer'
 
     def evaluate_hand_strength(self, hole_cards, community_cards):
-        # Convert cards to ranks and suits
-        all_cards = hole_cards + community_cards
-        ranks = [c[0] for c in all_cards]
-        suits = [c[1] for c in all_cards]
-
         # Simple hand strength evaluation (placeholder for more complex logic)
         # This would be replaced with a proper poker hand evaluator
-        if len(community_cards) == 0:  # Pre-flop
-            return self.evaluate_preflop(hole_cards)
-        elif len(community_cards) == 3:  # Flop
-            return self.evaluate_flop(hole_cards, community_cards)
-        elif len(community_cards) == 4:  # Turn
-            return self.evaluate_turn(hole_cards, community_cards)
-        else:  # River
-            return self.evaluate_river(hole_cards, community_cards)
+        return min(10, self.evaluate_preflop(hole_cards) + STREET_BONUS.get(len(community_cards), 2.0))
 
     def evaluate_preflop(self, hole_cards):
-        # Extract ranks and check if suited
-        r1, s1 = hole_cards[0][0], hole_cards[0][1]
-        r2, s2 = hole_cards[1][0], hole_cards[1][1]
-        suited = s1 == s2
-
-        # Sort ranks for consistent lookup
-        if self.rank_value(r1) > self.rank_value(r2):
-            high_rank, low_rank = r1, r2
-        else:
-            high_rank, low_rank = r2, r1
-
-        # Check for pairs
-        if high_rank == low_rank:
-            return PRE_FLOP_RANKINGS.get((high_rank, low_rank), 5)
-
-        # Check for suited hands
-        if suited:
-            return PRE_FLOP_RANKINGS.get((high_rank, low_rank, 's'), PRE_FLOP_RANKINGS.get((high_rank, low_rank), 3))
-
-        # Check for unsuited hands
-        return PRE_FLOP_RANKINGS.get((high_rank, low_rank), 3)
-
-    def evaluate_flop(self, hole_cards, community_cards):
-        # Basic flop evaluation (simplified)
-        preflop_strength = self.evaluate_preflop(hole_cards)
-        return min(10, preflop_strength + 1)  # Placeholder logic
-
-    def evaluate_turn(self, hole_cards, community_cards):
-        # Basic turn evaluation (simplified)
-        flop_strength = self.evaluate_flop(hole_cards, community_cards[:3])
-        return min(10, flop_strength + 0.5)  # Placeholder logic
-
-    def evaluate_river(self, hole_cards, community_cards):
-        # Basic river evaluation (simplified)
-        turn_strength = self.evaluate_turn(hole_cards, community_cards[:4])
-        return min(10, turn_strength + 0.5)  # Placeholder logic
-
-    def rank_value(self, rank):
-        if rank == 'A': return 14
-        if rank == 'K': return 13
-        if rank == 'Q': return 12
-        if rank == 'J': return 11
-        if rank == 'T': return 10
-        return int(rank)
+        return _preflop_rank(hole_cards[0], hole_cards[1])
 
     def calculate_pot_odds(self, game_state):
         current_player = game_state['players'][game_state['current_player']]
@@ -203,10 +228,15 @@ class AIStrategy:
 
     def make_decision(self, game_state):
         # Update tournament state
-        self.update_tournament_stage(game_state)
+        players = list(game_state['players'].values())
+        self.update_tournament_stage(game_state, players)
 
         # Get basic game information
         valid_actions = game_state['valid_actions']
+        # First occurrence wins, as with a linear scan
+        actions_by_name = {}
+        for a in valid_actions:
+            actions_by_name.setdefault(a['action'], a)
         current_player = game_state['players'][game_state['current_player']]
         hole_cards = current_player['hole_cards']
         community_cards = game_state['community_cards']
@@ -218,7 +248,7 @@ class AIStrategy:
 
         # Get strategic information
         hand_strength = self.evaluate_hand_strength(hole_cards, community_cards)
-        position = self.get_position(game_state)
+        position = self.get_position(game_state, players)
         pot_odds = self.calculate_pot_odds(game_state)
 
         # Get multipliers
@@ -234,55 +264,22 @@ class AIStrategy:
         is_short_stack = stack_to_blind_ratio < 10
 
         # Rank valid actions by preference
-        action_scores = {}
-
-        # Check if we can check
-        check_action = next((a for a in valid_actions if a['action'] == 'check'), None)
-        if check_action and adjusted_strength > 5:
-            action_scores['check'] = adjusted_strength
-
-        # Evaluate call
-        call_action = next((a for a in valid_actions if a['action'] == 'call'), None)
-        if call_action:
-            # Only call if hand strength is good or pot odds are favorable
-            if adjusted_strength > 6 or (adjusted_strength > 4 and pot_odds < 0.3):
-                action_scores['call'] = adjusted_strength + (0.5 if pot_odds < 0.2 else 0)
-
-        # Evaluate raise
-        raise_action = next((a for a in valid_actions if a['action'] == 'raise'), None)
-        if raise_action:
-            # Be more aggressive with strong hands, good position, or when short stacked
-            if adjusted_strength > 8 or (adjusted_strength > 7 and position_multiplier > 1.0) or (is_short_stack and adjusted_strength > 6):
-                strength_score = adjusted_strength
-                # Higher strength leads to higher raise
-                raise_score = strength_score + (position_multiplier - 1.0) * 2
-                action_scores['raise'] = raise_score
-
-        # Evaluate all-in
-        all_in_action = next((a for a in valid_actions if a['action'] == 'all_in'), None)
-        if all_in_action:
-            # Go all-in with very strong hands or as a last resort
-            if adjusted_strength > 9 or (is_short_stack and adjusted_strength > 7):
-                action_scores['all_in'] = 10.0  # Highest priority
-
-        # Evaluate fold
-        fold_action = next((a for a in valid_actions if a['action'] == 'fold'), None)
-        if fold_action:
-            # Fold with weak hands, especially out of position
-            if adjusted_strength < 4 or (adjusted_strength < 5 and position_multiplier < 1.0) or (pot_odds > 0.5 and adjusted_strength < 7):
-                action_scores['fold'] = 1.0  # Lowest priority
+        check_action = actions_by_name.get('check')
+        fold_action = actions_by_name.get('fold')
+        best_action_name = _choose_action(adjusted_strength, position_multiplier, pot_odds, is_short_stack,
+                                          bool(check_action), bool(actions_by_name.get('call')),
+                                          bool(actions_by_name.get('raise')), bool(actions_by_name.get('all_in')),
+                                          bool(fold_action))
 
         # Select best action
-        if not action_scores:
+        if best_action_name is None:
             # If no actions scored, default to fold or check
             if check_action:
                 return check_action
             return fold_action or valid_actions[0]
 
-        best_action_name = max(action_scores.items(), key=lambda x: x[1])[0]
-
         # Find the corresponding action
-        chosen_action = next((a for a in valid_actions if a['action'] == best_action_name), None)
+        chosen_action = actions_by_name.get(best_action_name)
 
         # Handle raise sizing
         if chosen_action and chosen_action['action'] == 'raise':
@@ -314,40 +311,66 @@ class AIStrategy:
 # Initialize strategy
 ai_strategy = AIStrategy()
 
+def _json_response(obj):
+    # Compact stdlib dump straight into a response, skipping jsonify's provider dispatch
+    return app.response_class(json.dumps(obj, separators=(',', ':')), mimetype='application/json')
+
 @app.route('/action', methods=['POST'])
 def get_action():
-    start_time = time.time()
+    start_ns = time.monotonic_ns()
     game_state = request.get_json()
 
     try:
         # Make decision
         decision = ai_strategy.make_decision(game_state)
-        return jsonify(decision)
+        return _json_response(decision)
     except Exception as e:
         # Fallback to safe action on error
         valid_actions = game_state.get('valid_actions', [])
+        actions_by_name = {}
+        for a in valid_actions:
+            actions_by_name.setdefault(a['action'], a)
         # Prefer check if possible, then fold
-        check_action = next((a for a in valid_actions if a['action'] == 'check'), None)
+        check_action = actions_by_name.get('check')
         if check_action:
-            return jsonify(check_action)
-        fold_action = next((a for a in valid_actions if a['action'] == 'fold'), None)
+            return _json_response(check_action)
+        fold_action = actions_by_name.get('fold')
         if fold_action:
-            return jsonify(fold_action)
+            return _json_response(fold_action)
         # Return first valid action as last resort
-        return jsonify(valid_actions[0] if valid_actions else {'action': 'fold', 'amount': 0})
+        return _json_response(valid_actions[0] if valid_actions else {'action': 'fold', 'amount': 0})
     finally:
         # Log response time
-        response_time = time.time() - start_time
-        if response_time > 2.5:  # Warn if close to timeout
-            print(f"WARNING: Slow response time: {response_time:.2f}s")
+        elapsed_ns = time.monotonic_ns() - start_ns
+        if elapsed_ns > SLOW_RESPONSE_NS:  # Warn if close to timeout
+            print(f"WARNING: Slow response time: {elapsed_ns / 1e9:.2f}s")
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "service": "demo2_AI"})
+    return _json_response({"status": "healthy", "service": "demo2_AI"})
+
+def serve_app(port, threads):
+    # waitress, then gevent's WSGI server, then the threaded Flask server
+    try:
+        from waitress import serve
+    except ImportError:
+        pass
+    else:
+        serve(app, host='0.0.0.0', port=port, threads=threads)
+        return
+    try:
+        # Handlers never block on I/O of their own, so no monkey-patching is needed
+        from gevent.pywsgi import WSGIServer
+    except ImportError:
+        app.run(host='0.0.0.0', port=port, threaded=True)
+    else:
+        WSGIServer(('0.0.0.0', port), app).serve_forever()
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Demo2 AI HTTP Server")
     parser.add_argument('--port', type=int, required=True, help='Port to listen on')
+    parser.add_argument('--threads', type=int, default=8, help='Worker threads for the waitress server')
     args = parser.parse_args()
 
-    app.run(host='0.0.0.0', port=args.port, threaded=True)
+    # start_ai.sh prefers gunicorn (demo2_ai:app); this path serves when run directly
+    serve_app(args.port, args.threads)
@@ -8,5 +8,9 @@ fi
 
 PORT=$1
 
-# Start the AI service
-python3 demo2_ai.py --port $PORT
+# Start the AI service (gunicorn when installed, otherwise the script's own server)
+cd "$(dirname "$0")"
+if command -v gunicorn >/dev/null 2>&1; then
+    exec gunicorn -w 4 -k gthread --threads 8 --keep-alive 5 -b 0.0.0.0:$PORT demo2_ai:app
+fi
+exec python3 demo2_ai.py --port $PORT
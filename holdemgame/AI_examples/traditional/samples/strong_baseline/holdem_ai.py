@@ -1,7 +1,8 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request
+import json
 import random
 import argparse
-from itertools import combinations
+from functools import lru_cache
 
 app = Flask(__name__)
 
@@ -9,47 +10,78 @@ app = Flask(__name__)
 SUITS = 'shdc'
 RANKS = '23456789TJQKA'
 
-class Card:
-    def __init__(self, card_str):
-        self.rank = card_str[0]
-        self.suit = card_str[1]
-        self.rank_value = RANKS.index(self.rank)
-    
-    def __str__(self):
-        return f"{self.rank}{self.suit}"
+def encode_card(card_str):
+    """把牌面字符串编码为整数：rank<<2 | 花色序号"""
+    return (RANKS.index(card_str[0]) << 2) | SUITS.index(card_str[1])
+
+# 52张牌的编码表，请求处理时只做一次字典查找
+ENCODE = {rank + suit: encode_card(rank + suit) for rank in RANKS for suit in SUITS}
+
+# 顺子的rank位掩码（含A-2-3-4-5）
+STRAIGHT_MASKS = frozenset([0b1000000001111] + [0b11111 << i for i in range(9)])
+ROYAL_MASK = 0b11111 << 8
+
+# 位棋盘评估用表：每张牌在52位整副牌掩码中的位（花色序号*13 + rank），以及13位掩码的位数与是否含顺子
+# CARD_BIT直接以牌面字符串为键，由编码推出，省去请求中的二次查找
+CARD_BIT = {card: 1 << (13 * (c & 3) + (c >> 2)) for card, c in ENCODE.items()}
+POPCNT13 = [bin(mask).count('1') for mask in range(8192)]
+HAS_STRAIGHT13 = [any(mask & m == m for m in STRAIGHT_MASKS) for mask in range(8192)]
+
+@lru_cache(maxsize=65536)
+def _score_mask(cards_mask):
+    """直接由四个花色掩码求5张及以上牌中最佳5张的评分，无需枚举组合；按整副牌掩码缓存"""
+    s0 = cards_mask & 0x1FFF
+    s1 = (cards_mask >> 13) & 0x1FFF
+    s2 = (cards_mask >> 26) & 0x1FFF
+    s3 = cards_mask >> 39
+    
+    # 同花顺 / 皇家同花顺
+    flush = False
+    for mask in (s0, s1, s2, s3):
+        if POPCNT13[mask] >= 5:
+            if mask & ROYAL_MASK == ROYAL_MASK:
+                return 1.0
+            if HAS_STRAIGHT13[mask]:
+                return 0.95
+            flush = True
+    
+    # 至少出现2/3/4次的rank
+    pairs = (s0 & s1) | (s0 & s2) | (s0 & s3) | (s1 & s2) | (s1 & s3) | (s2 & s3)
+    trips = (s0 & s1 & s2) | (s0 & s1 & s3) | (s0 & s2 & s3) | (s1 & s2 & s3)
+    if s0 & s1 & s2 & s3:  # 四条
+        return 0.9
+    if trips and POPCNT13[pairs] >= 2:  # 葫芦
+        return 0.85
+    if flush:  # 同花
+        return 0.8
+    if HAS_STRAIGHT13[s0 | s1 | s2 | s3]:  # 顺子
+        return 0.75
+    if trips:  # 三条
+        return 0.7
+    if pairs:  # 两对 / 一对
+        return 0.65 if POPCNT13[pairs] >= 2 else 0.6
+    return 0.5  # 高牌
 
 def get_hand_strength(hole_cards, community_cards):
     """计算手牌强度，返回0-1之间的值"""
     if not hole_cards:
         return 0.0
     
-    # 转换为Card对象
-    hole = [Card(card) for card in hole_cards]
-    community = [Card(card) for card in community_cards]
-    
-    # 计算最佳5张牌组合
-    all_cards = hole + community
-    if len(all_cards) < 5:
-        return evaluate_preflop_hand(hole)
-    
-    best_hand_value = 0
-    for combo in combinations(all_cards, 5):
-        hand_value = evaluate_hand(list(combo))
-        best_hand_value = max(best_hand_value, hand_value)
-    
-    return best_hand_value
+    if len(hole_cards) + len(community_cards) < 5:
+        if len(hole_cards) != 2:
+            return 0.0
+        return evaluate_preflop_hand((ENCODE[hole_cards[0]], ENCODE[hole_cards[1]]))
+    
+    # 计算最佳5张牌组合；掩码与牌的顺序无关，同一组牌只评估一次
+    cards_mask = 0
+    for card in hole_cards:
+        cards_mask |= CARD_BIT[card]
+    for card in community_cards:
+        cards_mask |= CARD_BIT[card]
+    return _score_mask(cards_mask)
 
-def evaluate_preflop_hand(hole_cards):
-    """评估翻牌前手牌强度"""
-    if len(hole_cards) != 2:
-        return 0.0
-    
-    card1, card2 = hole_cards
-    rank1, rank2 = card1.rank_value, card2.rank_value
-    
-    # 同花
-    suited = card1.suit == card2.suit
-    
+def _preflop_value(rank1, rank2, suited):
+    """起手牌强度规则，仅用于生成PREFLOP_TABLE"""
     # 对子
     if rank1 == rank2:
         pair_value = rank1
@@ -130,70 +162,30 @@ def evaluate_preflop_hand(hole_cards):
             # 其他非同花牌
             return 0.2 + (high_card / 13.0) * 0.15
 
-def evaluate_hand(cards):
-    """评估5张牌的手牌强度，返回0-1之间的值"""
-    if len(cards) != 5:
+def _build_preflop_table():
+    """169种起手牌的强度表，按 (高牌*13 + 低牌)*2 + 是否同花 索引"""
+    table = [0.0] * (13 * 13 * 2)
+    for high in range(13):
+        for low in range(high + 1):
+            for suited in (0, 1):
+                table[(high * 13 + low) * 2 + suited] = _preflop_value(high, low, bool(suited))
+    return table
+
+PREFLOP_TABLE = _build_preflop_table()
+
+def evaluate_preflop_hand(hole_cards):
+    """评估翻牌前手牌强度，hole_cards为整数编码的牌"""
+    if len(hole_cards) != 2:
         return 0.0
     
-    ranks = [card.rank_value for card in cards]
-    suits = [card.suit for card in cards]
-    
-    # 统计牌面
-    rank_counts = {}
-    for rank in ranks:
-        rank_counts[rank] = rank_counts.get(rank, 0) + 1
-    
-    counts = sorted(rank_counts.values(), reverse=True)
-    unique_ranks = sorted(rank_counts.keys(), reverse=True)
-    
-    # 同花
-    is_flush = len(set(suits)) == 1
-    
-    # 顺子
-    is_straight = False
-    if len(unique_ranks) == 5:
-        if unique_ranks[0] - unique_ranks[4] == 4:
-            is_straight = True
-        # A-2-3-4-5顺子
-        elif unique_ranks == [12, 3, 2, 1, 0]:
-            is_straight = True
-    
-    # 手牌类型评估
-    if is_straight and is_flush:
-        if unique_ranks[0] == 12 and unique_ranks[1] == 11:  # 皇家同花顺
-            return 1.0
-        else:  # 同花顺
-            return 0.95
-    elif counts[0] == 4:  # 四条
-        return 0.9
-    elif counts[0] == 3 and counts[1] == 2:  # 葫芦
-        return 0.85
-    elif is_flush:  # 同花
-        return 0.8
-    elif is_straight:  # 顺子
-        return 0.75
-    elif counts[0] == 3:  # 三条
-        return 0.7
-    elif counts[0] == 2 and counts[1] == 2:  # 两对
-        return 0.65
-    elif counts[0] == 2:  # 一对
-        return 0.6
-    else:  # 高牌
-        return 0.5
+    card1, card2 = hole_cards
+    rank1, rank2 = card1 >> 2, card2 >> 2
+    if rank1 < rank2:
+        rank1, rank2 = rank2, rank1
+    return PREFLOP_TABLE[(rank1 * 13 + rank2) * 2 + ((card1 & 3) == (card2 & 3))]
 
-def get_position_factor(player_id, players, dealer_index):
-    """计算位置因子"""
-    player_list = list(players.keys())
-    if player_id not in player_list:
-        return 1.0
-    
-    player_index = player_list.index(player_id)
-    dealer_pos = player_list.index(dealer_index) if dealer_index in player_list else 0
-    
-    # 计算相对位置
-    relative_pos = (player_index - dealer_pos) % len(player_list)
-    position_ratio = relative_pos / len(player_list)
-    
+def _position_for_ratio(position_ratio):
+    """按相对位置比例给出位置因子"""
     # 位置因子：按钮位=1.2，后位=1.1，中位=1.0，前位=0.9，盲注位=0.8
     if position_ratio < 0.2:  # 盲注位
         return 0.8
@@ -206,6 +198,27 @@ def get_position_factor(player_id, players, dealer_index):
     else:  # 按钮位
         return 1.2
 
+# 常见人数下各相对位置的位置因子，POSITION_FACTORS[人数][相对位置]
+POSITION_FACTORS = {n: tuple(_position_for_ratio(i / n) for i in range(n)) for n in range(1, 11)}
+
+def get_position_factor(player_id, players, dealer_index):
+    """计算位置因子"""
+    player_list = list(players)
+    try:
+        player_index = player_list.index(player_id)
+    except ValueError:
+        return 1.0
+    
+    dealer_pos = player_list.index(dealer_index) if dealer_index in player_list else 0
+    
+    # 计算相对位置
+    num_players = len(player_list)
+    relative_pos = (player_index - dealer_pos) % num_players
+    factors = POSITION_FACTORS.get(num_players)
+    if factors is None:
+        return _position_for_ratio(relative_pos / num_players)
+    return factors[relative_pos]
+
 def calculate_pot_odds(current_bet, pot_size, player_chips):
     """计算底池赔率"""
     if current_bet == 0:
@@ -217,37 +230,44 @@ def calculate_pot_odds(current_bet, pot_size, player_chips):
     
     return pot_size / call_amount
 
+# 激进因子的阶段系数：翻牌前更激进，转牌更保守，河牌最保守；其他阶段不调整
+PHASE_AGGRESSION = {'preflop': 1.1, 'flop': 1.0, 'turn': 0.9, 'river': 0.8}
+# 底池赔率系数，按 (赔率>=1) + (赔率>2) + (赔率>4) 索引：差(<1) / 一般 / 不错(>2) / 很好(>4)
+POT_ODDS_AGGRESSION = (0.8, 1.0, 1.1, 1.2)
+
 def get_aggression_factor(hand_strength, position_factor, pot_odds, phase):
     """计算激进因子"""
-    base_aggression = hand_strength * position_factor
-    
-    # 根据游戏阶段调整
-    if phase == 'preflop':
-        base_aggression *= 1.1  # 翻牌前更激进
-    elif phase == 'flop':
-        base_aggression *= 1.0
-    elif phase == 'turn':
-        base_aggression *= 0.9  # 转牌更保守
-    elif phase == 'river':
-        base_aggression *= 0.8  # 河牌最保守
-    
-    # 根据底池赔率调整
-    if pot_odds > 4:  # 很好的底池赔率
-        base_aggression *= 1.2
-    elif pot_odds > 2:  # 不错的底池赔率
-        base_aggression *= 1.1
-    elif pot_odds < 1:  # 差的底池赔率
-        base_aggression *= 0.8
+    # 依次乘以阶段系数和底池赔率系数（乘1.0不改变结果）
+    base_aggression = hand_strength * position_factor * PHASE_AGGRESSION.get(phase, 1.0)
+    base_aggression *= POT_ODDS_AGGRESSION[(pot_odds >= 1) + (pot_odds > 2) + (pot_odds > 4)]
     
     return min(base_aggression, 1.5)  # 限制最大激进因子
 
+# 决策阶梯：按手牌强度从高到低排列的档位 (强度下限(不含), 加注比例, 候选动作)
+# 候选动作为 (动作, 判断的因子, 阈值)，因子需严格大于阈值；因子为None表示无条件；都不满足时弃牌
+DECISION_LADDER = (
+    # 超强牌（> 0.9 加注更大）
+    (0.9, 0.8, (('raise', 'aggression', 0.7), ('call', None, 0), ('check', None, 0))),
+    (0.8, 0.5, (('raise', 'aggression', 0.7), ('call', None, 0), ('check', None, 0))),
+    # 强牌
+    (0.6, 0.3, (('raise', 'aggression', 0.6), ('call', None, 0), ('check', None, 0))),
+    # 中等牌：根据底池赔率决定
+    (0.4, 0.0, (('call', 'pot_odds', 3), ('check', None, 0), ('call', 'aggression', 0.5))),
+    # 弱牌：只有在很好的底池赔率时才跟注
+    (float('-inf'), 0.0, (('call', 'pot_odds', 5), ('check', None, 0))),
+)
+
+def _json_response(obj):
+    """用标准库json紧凑序列化后直接构造响应，省去jsonify的provider分派"""
+    return app.response_class(json.dumps(obj, separators=(',', ':')), mimetype='application/json')
+
 @app.route('/action', methods=['POST'])
 def get_action():
     game_state = request.get_json()
     
     valid_actions = game_state.get('valid_actions', [])
     if not valid_actions:
-        return jsonify({"action": "fold"})
+        return _json_response({"action": "fold"})
     
     # 获取游戏状态信息
     players = game_state.get('players', {})
@@ -259,7 +279,7 @@ def get_action():
     dealer_index = game_state.get('dealer_index', 0)
     
     if not current_player or current_player not in players:
-        return jsonify(valid_actions[0])
+        return _json_response(valid_actions[0])
     
     player_info = players[current_player]
     hole_cards = player_info.get('hole_cards', [])
@@ -277,70 +297,55 @@ def get_action():
     # 计算激进因子
     aggression_factor = get_aggression_factor(hand_strength, position_factor, pot_odds, phase)
     
-    # 决策逻辑
-    call_action = next((a for a in valid_actions if a['action'] == 'call'), None)
-    check_action = next((a for a in valid_actions if a['action'] == 'check'), None)
-    raise_action = next((a for a in valid_actions if a['action'] == 'raise'), None)
-    fold_action = next((a for a in valid_actions if a['action'] == 'fold'), None)
-    all_in_action = next((a for a in valid_actions if a['action'] == 'all_in'), None)
-    
-    # 根据激进因子和手牌强度做决策
-    decision_threshold = 0.5
-    
-    # 超强牌（手牌强度 > 0.8）
-    if hand_strength > 0.8:
-        if raise_action and aggression_factor > 0.7:
-            min_raise = raise_action['amount']['min']
-            max_raise = raise_action['amount']['max']
-            # 根据手牌强度决定加注大小
-            if hand_strength > 0.9:
-                raise_amount = int(min_raise + (max_raise - min_raise) * 0.8)
-            else:
-                raise_amount = int(min_raise + (max_raise - min_raise) * 0.5)
-            return jsonify({"action": "raise", "amount": raise_amount})
-        elif call_action:
-            return jsonify(call_action)
-        elif check_action:
-            return jsonify(check_action)
-    
-    # 强牌（手牌强度 > 0.6）
-    elif hand_strength > 0.6:
-        if raise_action and aggression_factor > 0.6:
-            min_raise = raise_action['amount']['min']
-            raise_amount = int(min_raise + (raise_action['amount']['max'] - min_raise) * 0.3)
-            return jsonify({"action": "raise", "amount": raise_amount})
-        elif call_action:
-            return jsonify(call_action)
-        elif check_action:
-            return jsonify(check_action)
-    
-    # 中等牌（手牌强度 > 0.4）
-    elif hand_strength > 0.4:
-        # 根据底池赔率决定
-        if pot_odds > 3 and call_action:
-            return jsonify(call_action)
-        elif check_action:
-            return jsonify(check_action)
-        elif call_action and aggression_factor > 0.5:
-            return jsonify(call_action)
-    
-    # 弱牌（手牌强度 <= 0.4）
-    else:
-        # 只有在很好的底池赔率或位置优势时才跟注
-        if pot_odds > 5 and call_action:
-            return jsonify(call_action)
-        elif check_action:
-            return jsonify(check_action)
+    # 决策逻辑：一次遍历按动作名建索引，同名动作取第一个
+    actions_by_name = {}
+    for a in valid_actions:
+        actions_by_name.setdefault(a['action'], a)
+    
+    # 根据激进因子和手牌强度做决策：找到强度档位，按顺序取第一个可用且满足条件的动作
+    factors = {'aggression': aggression_factor, 'pot_odds': pot_odds}
+    for floor, raise_fraction, candidates in DECISION_LADDER:
+        if hand_strength > floor:
+            break
+    for name, factor, threshold in candidates:
+        action = actions_by_name.get(name)
+        if action and (factor is None or factors[factor] > threshold):
+            if name == 'raise':
+                min_raise = action['amount']['min']
+                raise_amount = int(min_raise + (action['amount']['max'] - min_raise) * raise_fraction)
+                return _json_response({"action": "raise", "amount": raise_amount})
+            return _json_response(action)
     
     # 默认弃牌
+    fold_action = actions_by_name.get('fold')
     if fold_action:
-        return jsonify(fold_action)
+        return _json_response(fold_action)
     else:
-        return jsonify(valid_actions[0])
+        return _json_response(valid_actions[0])
+
+def warm_up():
+    """启动时走一遍/action的翻牌前和河牌路径，避免首个真实请求承担路由、JSON等的冷启动开销"""
+    client = app.test_client()
+    players = {'warmup': {'chips': 1000, 'hole_cards': ['As', 'Kd']}, 'other': {'chips': 1000}}
+    valid_actions = [{'action': 'fold', 'amount': 0}, {'action': 'call', 'amount': 20},
+                     {'action': 'raise', 'amount': {'min': 40, 'max': 1000}}]
+    for phase, community_cards in (('preflop', []), ('river', ['Qh', 'Jc', 'Ts', '9d', '2s'])):
+        client.post('/action', json={
+            'valid_actions': valid_actions, 'players': players, 'current_player': 'warmup',
+            'phase': phase, 'pot': 30, 'current_bet': 20, 'community_cards': community_cards, 'dealer_index': 0,
+        })
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Strong Baseline AI HTTP Server")
     parser.add_argument('--port', type=int, default=51012, help='Port to listen on')
+    parser.add_argument('--threads', type=int, default=8, help='Worker threads for the waitress server')
     args = parser.parse_args()
     
-    app.run(host='0.0.0.0', port=args.port)
+    warm_up()
+    # 评估器无共享可变状态（缓存除外），单进程多线程即可并发处理多局；未安装waitress时退回Flask多线程服务器
+    try:
+        from waitress import serve
+    except ImportError:
+        app.run(host='0.0.0.0', port=args.port, threaded=True)
+    else:
+        serve(app, host='0.0.0.0', port=args.port, threads=args.threads)
@@ -5,6 +5,12 @@ import json
 import uuid
 import os
 import socket
+import bisect
+from itertools import accumulate
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config import GAME_SERVER_CONFIG, TOURNAMENT_CONFIG, AI_CONFIGS, QUICK_AI_CONFIGS, BLIND_STRUCTURE
 from csv_reporter import CsvReporter
 
@@ -40,7 +46,17 @@ class Arena:
             "timeouts": 0,
             "action_errors": 0
         } for ai in self.ais}
+        # 复用连接：对战服务器一个会话，每个AI各一个会话
+        self.server_session = self._make_session()
+        self.ai_sessions = {ai['ai_id']: self._make_session() for ai in self.ais}
+        self.request_pool = ThreadPoolExecutor(max_workers=2)
+        self.batch_supported = True
+        # 最近一次 /state 响应，任何 POST 都可能改变牌局，届时清空
+        self.state_cache = {}
         self.blind_structure = self._load_blind_structure(default_blind_structure)
+        # 各级别累计手数，供 get_blind_level 二分查找
+        self.blind_levels = self.blind_structure['levels']
+        self.blind_cumulative = list(accumulate(level['duration'] for level in self.blind_levels))
         self.ai_statistics = {}
         self.current_round = 0
         self.round_history_files = {}
@@ -58,19 +74,76 @@ class Arena:
         logger.info("Using default blind structure.")
         return default_structure
 
+    def _make_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=len(self.ais) + 4,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.05, status_forcelist=[502, 503, 504])
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
     def _server_request(self, method, endpoint, data=None):
+        if method == 'POST':
+            self.state_cache.clear()
+        elif endpoint in self.state_cache:
+            return self.state_cache[endpoint]
+
         url = f"{self.server_config['url']}{endpoint}"
         try:
             if method == 'GET':
-                response = requests.get(url, timeout=self.server_config['timeout'])
+                response = self.server_session.get(url, timeout=self.server_config['timeout'])
             elif method == 'POST':
-                response = requests.post(url, json=data, timeout=self.server_config['timeout'])
+                response = self.server_session.post(url, json=data, timeout=self.server_config['timeout'])
             response.raise_for_status()
-            return response.json()
+            result = response.json()
+            if method == 'GET' and '/state' in endpoint:
+                self.state_cache[endpoint] = result
+            return result
         except requests.exceptions.RequestException as e:
             logger.error(f"Server request failed: {e}")
             return None
 
+    def _batch_endpoint(self, op, first_result):
+        query = {}
+        for key, value in op.get('query', {}).items():
+            if value == '$current_player':
+                value = str((first_result or {}).get('current_player'))
+            query[key] = value
+        return f"{op['path']}?{urlencode(query)}" if query else op['path']
+
+    def _server_batch(self, ops):
+        """Runs several GETs in one /batch round-trip, falling back to individual requests if the server lacks /batch."""
+        if self.batch_supported:
+            try:
+                response = self.server_session.post(f"{self.server_config['url']}/batch", json=ops, timeout=self.server_config['timeout'])
+                if response.status_code == 404:
+                    logger.info("Server does not support /batch, falling back to individual requests.")
+                    self.batch_supported = False
+                else:
+                    response.raise_for_status()
+                    results = []
+                    for op, result in zip(ops, response.json()):
+                        if 200 <= result['status'] < 300:
+                            results.append(result['body'])
+                        else:
+                            logger.error(f"Server request failed: {result['status']} for {op['path']}")
+                            results.append(None)
+                    for op, result in zip(ops, results):
+                        if result is not None and op['path'].endswith('/state'):
+                            self.state_cache[self._batch_endpoint(op, results[0])] = result
+                    return results
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Server batch request failed: {e}")
+                return [None] * len(ops)
+
+        # 首个请求决定 $current_player，其余请求并行发出
+        first = self._server_request(ops[0]['method'], self._batch_endpoint(ops[0], None))
+        rest = self.request_pool.map(lambda op: self._server_request(op['method'], self._batch_endpoint(op, first)), ops[1:])
+        return [first, *rest]
+
     def _ai_request(self, ai_config, game_state):
         start_time = time.time()
         action = {"action": "fold", "amount": 0} # Default action
@@ -83,7 +156,7 @@ class Arena:
                         logger.warning(f"AI {ai_config['ai_name']} is missing hole_cards in game state.")
 
             
-            response = requests.post(f"{ai_config['url']}/action", json=game_state, timeout=TIMEOUT)
+            response = self.ai_sessions[ai_config['ai_id']].post(f"{ai_config['url']}/action", json=game_state, timeout=TIMEOUT)
             response.raise_for_status()
             action = response.json()
             if action is None or not isinstance(action, dict):
@@ -201,7 +274,7 @@ class Arena:
 
     def run_elimination_game(self):
         hand_num = 0
-        current_blind_level = None
+        current_blind_index = None
         max_hands = self.tournament_config.get('max_hands_per_round')
 
         while True:
@@ -215,9 +288,10 @@ class Arena:
                 logger.info("Elimination game finished.")
                 break
 
-            new_blind_level = self.get_blind_level(hand_num)
-            if new_blind_level != current_blind_level:
-                current_blind_level = new_blind_level
+            new_blind_index = self.get_blind_level_index(hand_num)
+            if new_blind_index != current_blind_index:
+                current_blind_index = new_blind_index
+                current_blind_level = self.blind_levels[current_blind_index]
                 logger.info(f"Hand {hand_num}: Blind level updated to {current_blind_level['small_blind']}/{current_blind_level['big_blind']}")
                 self._server_request('POST', f'/games/{self.game_id}/blinds', {
                     "small_blind": current_blind_level['small_blind'],
@@ -246,13 +320,12 @@ class Arena:
                 break
             time.sleep(self.tournament_config['delay_between_hands'])
 
+    def get_blind_level_index(self, hand_number):
+        index = bisect.bisect_left(self.blind_cumulative, hand_number)
+        return min(index, len(self.blind_levels) - 1) # Stay on last level if hands exceed total duration
+
     def get_blind_level(self, hand_number):
-        total_duration = 0
-        for level in self.blind_structure['levels']:
-            total_duration += level['duration']
-            if hand_number <= total_duration:
-                return level
-        return self.blind_structure['levels'][-1] # Return last level if hands exceed total duration
+        return self.blind_levels[self.get_blind_level_index(hand_number)]
 
     def play_hand(self):
         hand_over = False
@@ -274,9 +347,12 @@ class Arena:
                 logger.info(f"Blinds: Small Blind: {sb_player['name']} ({state['small_blind']}), Big Blind: {bb_player['name']} ({state['big_blind']})")
 
         while not hand_over:
-            state = self._server_request('GET', f'/games/{self.game_id}/state')
-            current_player_id = state.get('current_player')
-            state = self._server_request('GET', f'/games/{self.game_id}/state?player_id={current_player_id}')
+            # 一次往返取回公共状态、当前玩家视角的状态及其合法动作
+            _, state, valid_actions = self._server_batch([
+                {"method": "GET", "path": f"/games/{self.game_id}/state"},
+                {"method": "GET", "path": f"/games/{self.game_id}/state", "query": {"player_id": "$current_player"}},
+                {"method": "GET", "path": f"/games/{self.game_id}/actions", "query": {"player_id": "$current_player"}}
+            ])
             if not state:
                 logger.error("Could not get game state.")
                 break
@@ -307,7 +383,6 @@ class Arena:
                 logger.error(f"Could not find AI config for player {current_player_id}")
                 action = {"action": "fold", "amount": 0}
             else:
-                valid_actions = self._server_request('GET', f'/games/{self.game_id}/actions?player_id={current_player_id}')
                 state['valid_actions'] = valid_actions.get('valid_actions', []) if valid_actions else []
                 
                 action = self._ai_request(ai_config, state)
@@ -415,6 +490,11 @@ class Arena:
         report_filename = f"tournament_report_{self.tournament_id}.json"
         self._save_json_report(final_report, report_filename)
 
+        self.request_pool.shutdown()
+        self.server_session.close()
+        for session in self.ai_sessions.values():
+            session.close()
+
 if __name__ == '__main__':
     import argparse
 
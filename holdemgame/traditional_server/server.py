@@ -2,6 +2,7 @@ import random
 import logging
 from flask import Flask, request, jsonify
 from werkzeug.serving import run_simple
+from werkzeug.exceptions import HTTPException
 import uuid
 import argparse
 import datetime
@@ -760,6 +761,45 @@ def update_game_blinds(game_id):
 
     return jsonify({"status": "blinds_updated", "message": message}), 200
 
+@app.route('/batch', methods=['POST'])
+def batch_requests():
+    ops = request.get_json()
+    if not isinstance(ops, list):
+        return jsonify({"error": "A list of operations is required"}), 400
+
+    # Query values of "$current_player" resolve against the first operation's response
+    adapter = app.url_map.bind('localhost')
+    results = []
+    first_body = None
+    for i, op in enumerate(ops):
+        if not isinstance(op, dict) or not isinstance(op.get('path'), str) or not isinstance(op.get('query', {}), dict):
+            results.append({"status": 400, "body": {"error": "Each operation needs a string path and an optional query object"}})
+            continue
+        if op.get('method', 'GET') != 'GET':
+            results.append({"status": 405, "body": {"error": "Only GET operations can be batched"}})
+            continue
+
+        query = {}
+        for key, value in op.get('query', {}).items():
+            if value == '$current_player':
+                value = str((first_body or {}).get('current_player'))
+            query[key] = value
+
+        try:
+            endpoint, view_args = adapter.match(op['path'], method='GET')
+        except HTTPException as e:
+            results.append({"status": e.code, "body": {"error": e.name}})
+            continue
+
+        with app.test_request_context(op['path'], method='GET', query_string=query):
+            response = app.make_response(app.view_functions[endpoint](**view_args))
+        body = response.get_json()
+        if i == 0 and isinstance(body, dict):
+            first_body = body
+        results.append({"status": response.status_code, "body": body})
+
+    return jsonify(results), 200
+
 
 @app.route('/health', methods=['GET'])
 def health_check():